@@ -1 +1,9 @@
+import os
+
 __author__ = 'alex'
+
+# Debug build switch. When set, devices are assembled from the instrumented
+# classes (per-access logging, bounds-checked memory), otherwise from the
+# logging-free fast ones. Read once at import, set ASEC_DEBUG=1 to enable;
+# a single device can still override it with Device(debug=True).
+DEBUG = os.environ.get('ASEC_DEBUG', '') not in ('', '0')
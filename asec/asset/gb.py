@@ -1,94 +1,311 @@
 import time
+import struct
 
-from asec.device import Mainboard
-from asec.memory.mmu.gb import MMU
-from asec.processor.z80 import Processor
-from asec.graphics.gb.gpu import GPU
+import asec
+from asec.device import Mainboard, Scheduler
+from asec.memory.mmu.gb import MMU, DebugMMU
+from asec.processor.z80 import Processor, DebugProcessor
+from asec.processor.translator import BlockTranslator
+from asec.graphics.gb.gpu import GPU, DebugGPU
 from asec.input.gb.keyboard import Keyboard
-from asec.timer.gb import Timer
+from asec.serial.gb import SerialPort
+from asec.interrupt.gb import InterruptController
+from asec.timer.gb import Timer, DebugTimer
+from asec.utils.signal import Signal
+
+
+# One LCD frame lasts 70224 T-cycles, 17556 m-cycles
+FRAME_CYCLES = 17556
+
+# Save state format: magic, version, cartridge header (0x0134-0x014F),
+# frame overrun; then each component's state prefixed by its length
+STATE_MAGIC = b'ASEC'
+STATE_VERSION = 5
+_STATE_HEADER = struct.Struct('<4sH28sI')
+_STATE_LENGTH = struct.Struct('<I')
+
+
+class FrameResult(object):
+    """
+    Outcome of Device.run_frame()/run_cycles()
+    """
+    def __init__(self, cycles, instructions, stopped):
+        self.cycles = cycles  # m-cycles
+        self.instructions = instructions
+        self.stopped = stopped
+
+    def __repr__(self):
+        return '<FrameResult: %i cycles, %i instructions%s>' % (
+            self.cycles, self.instructions, ', stopped' if self.stopped else ''
+        )
 
 
 class Device(Mainboard):
-    def __init__(self):
+    def __init__(self, debug=None):
+        """
+        @param debug bool use the instrumented components,
+                          defaults to asec.DEBUG
+        """
         super(Device, self).__init__()
 
         self.name = 'GameBoy'
 
         self._loop = True
 
-        self.CPU = Processor(self)
-        self.MMU = MMU(self)
-        self.GPU = GPU(self)
+        self.debug = asec.DEBUG if debug is None else bool(debug)
+        self.INT = InterruptController()
+        self.CPU = (DebugProcessor if self.debug else Processor)(self)
+        # GPU and timer events are stamped with the CPU clock
+        self.scheduler = Scheduler(self.CPU.CLOCK)
+        if self.debug:
+            self.GPU = DebugGPU(self)
+            self.MMU = DebugMMU(self)
+            self.TIMER = DebugTimer(self)
+        else:
+            self.GPU = GPU(self)
+            self.MMU = MMU(self)
+            self.TIMER = Timer(self)
         self.KEY = Keyboard(self)
-        self.TIMER = Timer(self)
+        self.SERIAL = SerialPort(self)
+        self.CPU.bindMemory(self.MMU)
+
+        # Debug builds trace every instruction, so they are not translated
+        self.translator = None if self.debug else \
+            BlockTranslator(self.CPU, self.MMU)
+
+        # m-cycles the last frame ran past its end
+        self._frameOverrun = 0
+
+        # emitted by run_frame() with its FrameResult, outside of any
+        # scheduler event, so listeners may load a state
+        self.frameEnded = Signal()
+
+        # battery-backed RAM is written back once per frame
+        self.GPU.renderScreen.connect(self._frameDone)
 
     def reset(self):
+        self._frameOverrun = 0
+        self.scheduler.reset()
+        if self.translator is not None:
+            self.translator.reset()
+        self.INT.reset()
+        self.CPU.reset()
         self.MMU.reset()
         self.GPU.reset()
-        self.CPU.reset()
         self.KEY.reset()
         self.TIMER.reset()
+        self.SERIAL.reset()
         self.log.debug('reset')
 
-    def insertCartridge(self, filePath):
+    def _stateComponents(self):
+        # the scheduler goes last, loading the others does not schedule
+        return (
+            self.INT, self.CPU, self.MMU, self.GPU, self.TIMER, self.KEY,
+            self.SERIAL, self.scheduler
+        )
+
+    def save_state(self):
+        """
+        snapshot of the whole machine, the cartridge ROM is not included
+        @return bytes
+        """
+        state = [_STATE_HEADER.pack(
+            STATE_MAGIC, STATE_VERSION,
+            bytes(self.MMU.ROM.view[0x134:0x150]), self._frameOverrun
+        )]
+        for component in self._stateComponents():
+            data = component.saveState()
+            state.append(_STATE_LENGTH.pack(len(data)))
+            state.append(data)
+        return b''.join(state)
+
+    def load_state(self, data):
+        """
+        restores a save_state() snapshot, the same cartridge must be inserted
+        @param data bytes
+        """
+        data = memoryview(data)
+        if len(data) < _STATE_HEADER.size:
+            raise ValueError('Not a save state')
+        magic, version, header, overrun = _STATE_HEADER.unpack_from(data)
+        if magic != STATE_MAGIC:
+            raise ValueError('Not a save state')
+        if version != STATE_VERSION:
+            raise ValueError('Unsupported save state version %i' % version)
+        if header != bytes(self.MMU.ROM.view[0x134:0x150]):
+            raise ValueError('Save state is for another cartridge')
+
+        offset = _STATE_HEADER.size
+        sections = []
+        for component in self._stateComponents():
+            length, = _STATE_LENGTH.unpack_from(data, offset)
+            offset += _STATE_LENGTH.size
+            sections.append((component, data[offset:offset + length]))
+            offset += length
+
+        for component, section in sections:
+            component.loadState(section)
+        self._frameOverrun = overrun
+        self.log.debug('state loaded')
+
+    def insertCartridge(self, filePath, battery=True):
+        """
+        @param filePath str
+        @param battery bool keep battery-backed RAM in a save file
+        """
         self.log.debug('Cartridge inserted "%s".' % filePath)
         # if self._started.is_set():
         #     self._stop()
         self.reset()
         self.MMU.loadROM(filePath)
+        if battery:
+            self.MMU.loadBattery(self.MMU.batteryPath(filePath))
         # self.start()
 
+    def close(self):
+        """
+        writes back and closes the cartridge save file
+        """
+        self.MMU.closeERAM()
+
+    def _frameDone(self, screen):
+        self.MMU.flushERAM()
+
     def frame(self):
-        # fclock = self.CPU.CLOCK.m+17556
-        # self.log.debug("Frame")
-        if self.CPU._HALT:
-            self.CPU.R.m = 1
+        """
+        executes one instruction, or services one interrupt, or skips
+        halted cycles up to the next event
+        """
+        cpu = self.CPU
+        if cpu._HALT and self.INT.requested:
+            # any requested interrupt ends HALT, even with IME off
+            cpu._HALT = 0
+
+        if self.INT.pending:
+            cpu.R.m = self._interrupt()
+        elif cpu._HALT:
+            # nothing changes until the next event
+            clock = cpu.CLOCK.m
+            cpu.R.m = max(
+                min(self.scheduler.deadline, clock + FRAME_CYCLES) - clock, 1
+            )
         else:
-            instruction = self.MMU.readByte(self.CPU.R.pc)
-
-            self.CPU.call(instruction)
-
-            self.CPU.R.pc += 1
-            self.CPU.R.pc &= 65535
-
-        # if self.CPU.R.ime and self.MMU.IE and self.MMU.IF:
-        #     self.CPU._HALT = 0
-        #     self.CPU.R.ime = 0
-        #     ifired = self.MMU.IE & self.MMU.IF
-        #     if ifired & 1:
-        #         self.MMU.IF &= 0xFE
-        #         self.CPU.RST40()
-        #     elif ifired & 2:
-        #         self.MMU.IF &= 0xFD
-        #         self.CPU.RST48()
-        #     elif ifired & 4:
-        #         self.MMU.IF &= 0xFB
-        #         self.CPU.RST50()
-        #     elif ifired & 8:
-        #         self.MMU.IF &= 0xF7
-        #         self.CPU.RST58()
-        #     elif ifired & 16:
-        #         self.MMU.IF &= 0xEF
-        #         self.CPU.RST60()
-        #     else:
-        #         self.CPU.R.ime = 1
-
-        self.CPU.CLOCK.m += self.CPU.R.m
-        # self.CPU.CLOCK.t += self.CPU.R.t
-        self.TIMER.inc()
-
-        self.GPU.checkline()
-
-        # if self.CPU.CLOCK.m >= fclock:
-        #     self.CPU._STOP = 1
+            cpu.R.m = self._step()
+
+        cpu.CLOCK.m += cpu.R.m
+        if cpu.CLOCK.m >= self.scheduler.deadline:
+            self.scheduler.run(cpu.CLOCK.m)
+
+    def _step(self):
+        """
+        interprets one instruction
+        @return int m-cycles taken
+        """
+        cpu = self.CPU
+        R = cpu.R
+        instruction = self.MMU.readByte(R.pc)
+        R.pc += 1
+        cpu._map[instruction]()
+        R.pc &= 65535
+        return R.m
+
+    def _interrupt(self):
+        """
+        runs the instruction after EI, interpreted, or calls the handler of
+        the pending interrupt with the highest priority
+        @return int m-cycles taken
+        """
+        interrupts = self.INT
+        if interrupts.delay:
+            # exactly one instruction, it may be a DI or another EI; an
+            # interrupt pending after it is taken on the next iteration
+            interrupts.endDelay()
+            return self._step()
+        return self.CPU.interrupt(interrupts.acknowledge())
+
+    def run_frame(self):
+        """
+        runs one LCD frame worth of cycles, overruns of the previous frame
+        are taken off so that frames stay aligned
+        @return FrameResult
+        """
+        budget = FRAME_CYCLES - self._frameOverrun
+        result = self.run_cycles(budget)
+        self._frameOverrun = max(result.cycles - budget, 0)
+        self.frameEnded(result)
+        return result
+
+    def run_cycles(self, cycles):
+        """
+        runs at least `cycles` m-cycles, ending on an instruction boundary.
+        Timer and GPU work only happens when a scheduled event is due.
+        Code is run as translated blocks where possible, instruction by
+        instruction otherwise. Nothing changes while the CPU is halted or
+        polling memory until the next event, so both skip right to it.
+        @param cycles int
+        @return FrameResult
+        """
+        cpu = self.CPU
+        R = cpu.R
+        CLOCK = cpu.CLOCK
+        ops = cpu._map
+        readByte = self.MMU.readByte
+        interrupts = self.INT
+        scheduler = self.scheduler
+        translator = self.translator
+        lookup = translator.lookup if translator else None
+
+        clock = CLOCK.m
+        target = clock + cycles
+        instructions = 0
+
+        while clock < target and not cpu._STOP:
+            if interrupts.pending:
+                m = self._interrupt()
+            elif cpu._HALT:
+                # any requested interrupt ends HALT, even with IME off
+                if interrupts.requested:
+                    cpu._HALT = 0
+                    continue
+                m = min(scheduler.deadline, target) - clock
+                if m < 1:
+                    m = 1
+                instructions += 1
+            else:
+                block = lookup(R.pc) if lookup else None
+                # blocks run whole, so one crossing the next event is
+                # interpreted to keep events on the same instruction
+                if block is None or clock + block.cycles > scheduler.deadline:
+                    instruction = readByte(R.pc)
+                    R.pc += 1
+                    ops[instruction]()
+                    R.pc &= 65535
+                    m = R.m
+                    instructions += 1
+                elif block.polls is not None:
+                    m, count = translator.spin(
+                        block, min(scheduler.deadline, target) - clock
+                    )
+                    instructions += count
+                else:
+                    m = block.run()
+                    instructions += block.count
+
+            clock += m
+            CLOCK.m = clock
+            if clock >= scheduler.deadline:
+                scheduler.run(clock)
+
+        return FrameResult(
+            clock - target + cycles, instructions, bool(cpu._STOP)
+        )
 
     def run(self):
         self.log.debug('Execution loop started')
         self.CPU._STOP = 0
         while self.CPU._STOP == 0:
-            self.frame()
-            # self.CPU.execute()
-            # time.sleep(.0016)
+            # translated blocks, HALT and polling skips all run in frames
+            self.run_frame()
         self.log.debug('Execution loop ended')
 
     def play(self):
@@ -1,4 +1,3 @@
-import array
 import logging
 
 from asec.memory.memorybank import MemoryBank
@@ -23,11 +22,11 @@ class BIOS(MemoryBank):
         0x21, 0x04, 0x01, 0x11, 0xA8, 0x00, 0x1A, 0x13, 0xBE, 0x20, 0xFE, 0x23, 0x7D, 0xFE, 0x34, 0x20,
         0xF5, 0x06, 0x19, 0x78, 0x86, 0x23, 0x05, 0x20, 0xFB, 0x86, 0x20, 0xFE, 0x3E, 0x01, 0xE0, 0x50 ]
 
-    def __init__(self):
-        super(BIOS, self).__init__(0x0100)
+    def __init__(self, checked=False):
+        super(BIOS, self).__init__(0x0100, checked=checked)
         self.log = logging.getLogger(self.__class__.__name__)
         self.reset()
 
     def reset(self):
         super(BIOS, self).reset()
-        self._buffer.fromlist(self.DEFAULT_STATE)
+        self._buffer[:len(self.DEFAULT_STATE)] = bytes(self.DEFAULT_STATE)
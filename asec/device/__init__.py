@@ -1,2 +1,4 @@
 from asec.device.mainboard import Mainboard
-__all__ = [Mainboard,]
\ No newline at end of file
+from asec.device.scheduler import Scheduler
+from asec.device.rewind import Rewind
+__all__ = [Mainboard, Scheduler, Rewind]
\ No newline at end of file
@@ -0,0 +1,187 @@
+import zlib
+import logging
+from collections import deque
+
+
+def _xor(a, b):
+    """
+    @param a bytes
+    @param b bytes of the same length
+    @return bytes
+    """
+    return (
+        int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')
+    ).to_bytes(len(a), 'little')
+
+
+class Rewind(object):
+    """
+    Ring buffer of device snapshots for stepping back in time.
+
+    A snapshot is taken every `interval` frames, on the frame boundary
+    signalled by GPU.renderScreen. Only the newest snapshot is kept whole;
+    every older one is stored as its XOR against the next newer snapshot,
+    zlib compressed. Frames change little of the RAM, so these deltas are
+    mostly zeros and compress well. Stepping back XORs the newest whole
+    snapshot with the next delta, and when the memory budget is exceeded
+    the oldest deltas are dropped without touching the rest.
+
+    Front-ends call hold() from any thread while their rewind key is down:
+    the device then steps back one snapshot per frame, between frames of
+    the thread running it.
+    """
+    def __init__(self, device, interval=4, budget=16 << 20):
+        """
+        @param device Device
+        @param interval int frames between snapshots
+        @param budget int bytes kept at most
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.device = device
+        self.interval = max(1, int(interval))
+        self.budget = int(budget)
+
+        # frames completed since attached
+        self.frame = 0
+
+        self._head = None
+        self._headFrame = None
+        # (frame, compressed delta to the next newer snapshot), oldest first
+        self._deltas = deque()
+        self._size = 0
+
+        # stepping back once per frame
+        self.holding = False
+
+        device.scheduler.register('rewind.capture', self._capture)
+        device.GPU.renderScreen.connect(self._frameDone)
+        device.frameEnded.connect(self._frameEnded)
+
+    def detach(self):
+        self.device.GPU.renderScreen.disconnect(self._frameDone)
+        self.device.frameEnded.disconnect(self._frameEnded)
+        self.device.scheduler.cancel('rewind.capture')
+
+    def hold(self, held):
+        """
+        @param held bool step back once per frame until released
+        """
+        self.holding = bool(held)
+
+    def clear(self):
+        self._head = None
+        self._headFrame = None
+        self._deltas.clear()
+        self._size = 0
+
+    @property
+    def frames(self):
+        """
+        recorded frames, oldest first
+        @return list
+        """
+        frames = [frame for frame, _ in self._deltas]
+        if self._head is not None:
+            frames.append(self._headFrame)
+        return frames
+
+    @property
+    def size(self):
+        """
+        bytes held by the snapshots
+        @return int
+        """
+        return self._size
+
+    def _frameDone(self, screen):
+        self.frame += 1
+        if self.frame % self.interval == 0:
+            # taken once the GPU event signalling the frame has completed
+            scheduler = self.device.scheduler
+            scheduler.schedule('rewind.capture', scheduler.now)
+
+    def _capture(self, when):
+        self.record()
+
+    def _frameEnded(self, result):
+        if self.holding:
+            self.back()
+
+    def record(self):
+        """
+        takes a snapshot of the device now
+        """
+        state = self.device.save_state()
+        if self._head is not None:
+            if len(self._head) != len(state):
+                self.clear()
+            else:
+                delta = zlib.compress(_xor(self._head, state), 1)
+                self._deltas.append((self._headFrame, delta))
+                self._size += len(delta) - len(self._head)
+
+        self._head = state
+        self._headFrame = self.frame
+        self._size += len(state)
+
+        while self._deltas and self._size > self.budget:
+            _, delta = self._deltas.popleft()
+            self._size -= len(delta)
+
+    def _pop(self):
+        """
+        drops the newest snapshot, the one before it becomes the newest
+        """
+        self._size -= len(self._head)
+        if self._deltas:
+            self._headFrame, delta = self._deltas.pop()
+            self._size -= len(delta)
+            self._head = _xor(self._head, zlib.decompress(delta))
+            self._size += len(self._head)
+        else:
+            self._head = None
+            self._headFrame = None
+
+    def _restore(self):
+        """
+        restores the newest snapshot and drops it
+        @return int restored frame
+        """
+        state = self._head
+        frame = self._headFrame
+        self._pop()
+        self.device.load_state(state)
+        self.frame = frame
+        return frame
+
+    def back(self):
+        """
+        steps back to the previous snapshot and drops the newer ones, so
+        repeated calls step further back
+        @return int|None restored frame, None if there is nothing recorded
+        """
+        if self._head is None:
+            return None
+        if self._deltas and self.frame - self._headFrame < self.interval:
+            # taken less than `interval` frames ago, restoring it would
+            # barely move
+            self._pop()
+        return self._restore()
+
+    def seek(self, frame):
+        """
+        restores the newest snapshot taken at or before `frame`,
+        the snapshots after it are dropped
+        @param frame int
+        @return int|None restored frame, None if none is old enough
+        """
+        frames = self.frames
+        if not frames or frames[0] > frame:
+            return None
+
+        while self._headFrame > frame:
+            # skip newer snapshots without restoring them
+            self._pop()
+
+        return self._restore()
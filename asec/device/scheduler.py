@@ -0,0 +1,137 @@
+import heapq
+import struct
+import logging
+from itertools import count
+
+
+NEVER = float('inf')
+
+_EVENT = struct.Struct('<qB')
+
+
+class Scheduler(object):
+    """
+    Cycle-stamped event queue.
+
+    Components register a callback under a name once, then schedule it
+    for an absolute m-cycle of the CPU clock. The execution loop only
+    compares the clock against `deadline` after each instruction and calls
+    run() when it is reached, instead of polling every component.
+    Rescheduling a pending event replaces it.
+    """
+    def __init__(self, clock):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._clock = clock
+        self._callbacks = {}
+        self._queue = []
+        self._pending = {}
+        self._sequence = count()
+
+        # m-cycle of the earliest pending event
+        self.deadline = NEVER
+
+    def reset(self):
+        self._queue = []
+        self._pending = {}
+        self.deadline = NEVER
+
+    @property
+    def now(self):
+        return self._clock.m
+
+    def register(self, name, callback):
+        """
+        @param name str
+        @param callback callable(when), `when` is the scheduled m-cycle
+        """
+        self._callbacks[name] = callback
+
+    def schedule(self, name, when):
+        """
+        schedules (or moves) an event
+        @param name str
+        @param when int absolute m-cycle
+        """
+        entry = [when, next(self._sequence), name]
+        self._pending[name] = entry
+        heapq.heappush(self._queue, entry)
+        if when < self.deadline:
+            self.deadline = when
+
+    def cancel(self, name):
+        entry = self._pending.pop(name, None)
+        if entry is not None:
+            entry[2] = None
+            self._update()
+
+    def when(self, name):
+        """
+        @param name str
+        @return int|None m-cycle the event is scheduled for
+        """
+        entry = self._pending.get(name)
+        return entry[0] if entry is not None else None
+
+    def run(self, now):
+        """
+        fires every event due at `now`, in deadline order
+        @param now int
+        """
+        queue = self._queue
+        pending = self._pending
+        while queue and queue[0][0] <= now:
+            entry = heapq.heappop(queue)
+            when, _, name = entry
+            # cancelled or superseded by a later schedule()
+            if name is None or pending.get(name) is not entry:
+                continue
+            del pending[name]
+            self._callbacks[name](when)
+        self._update()
+
+    def _update(self):
+        queue = self._queue
+        # drop cancelled and superseded entries from the head
+        while queue and (
+            queue[0][2] is None or
+            self._pending.get(queue[0][2]) is not queue[0]
+        ):
+            heapq.heappop(queue)
+        self.deadline = queue[0][0] if queue else NEVER
+
+    def saveState(self):
+        """
+        pending events in firing order, as m-cycle, name length, name
+        @return bytes
+        """
+        entries = sorted(self._pending.values())
+        return b''.join(
+            _EVENT.pack(when, len(name)) + name.encode('ascii')
+            for when, _, name in entries
+        )
+
+    def loadState(self, data):
+        """
+        replaces the pending events, events nothing is registered for
+        here are dropped
+        @param data bytes from saveState()
+        """
+        self.reset()
+        offset = 0
+        while offset < len(data):
+            when, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = bytes(data[offset:offset + length]).decode('ascii')
+            offset += length
+            if name in self._callbacks:
+                self.schedule(name, when)
+            else:
+                self.log.warning('dropped unknown event %s', name)
+
+    def events(self):
+        """
+        pending events
+        @return dict name -> m-cycle
+        """
+        return dict((name, entry[0]) for name, entry in self._pending.items())
@@ -0,0 +1,254 @@
+"""
+ROM test farm: runs every ROM of a directory headless, one independent
+Device per worker process, so a run uses all cores instead of sharing
+one interpreter lock.
+
+Usage:
+    python -m asec.farm roms/ --frames 3000
+    python -m asec.farm roms/cpu_instrs.gb roms/Tetris.gb --json report.json
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from asec.headless import HeadlessRunner, TEST_FAILED
+
+
+# ROM file extensions picked up from directories
+EXTENSIONS = ('.gb', '.gbc')
+
+
+class FarmResult(object):
+    """
+    Outcome of one ROM, plain attributes only so it pickles back from
+    the worker processes
+    """
+    def __init__(self, path):
+        self.path = path
+        self.frames = 0
+        self.cycles = 0  # m-cycles
+        self.instructions = 0
+        self.elapsed = 0.0
+        self.frameDigest = None
+        self.memoryDigest = None
+        self.serial = ''
+        # test ROM result the run stopped on, 'Passed', 'Failed' or None
+        self.verdict = None
+        self.error = None
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def failed(self):
+        """
+        the ROM reported a failing test over serial
+        @return bool
+        """
+        return self.verdict == TEST_FAILED
+
+    @property
+    def ok(self):
+        return self.error is None and not self.failed
+
+    @property
+    def speed(self):
+        """
+        ratio to the real-time GameBoy speed
+        @return float
+        """
+        if not self.elapsed:
+            return 0.0
+        return self.cycles * 4 / self.elapsed / 4194304
+
+    def toDict(self):
+        return {
+            'path': self.path,
+            'frames': self.frames,
+            'cycles': self.cycles * 4,
+            'instructions': self.instructions,
+            'seconds': self.elapsed,
+            'speed': self.speed,
+            'frame_sha1': self.frameDigest,
+            'memory_sha1': self.memoryDigest,
+            'serial': self.serial,
+            'verdict': self.verdict,
+            'ok': self.ok,
+            'error': self.error,
+        }
+
+
+def runROM(path, frames=None, cycles=None):
+    """
+    runs one ROM headless, executed in a worker process
+    @param path str
+    @param frames int
+    @param cycles int m-cycles
+    @return FarmResult
+    """
+    result = FarmResult(path)
+    started = time.perf_counter()
+    try:
+        # save files are left alone, runs start from the same RAM
+        runner = HeadlessRunner.fromFile(path, debug=False, battery=False)
+        runner.stopOnSerial()
+        run = runner.run(frames=frames, cycles=cycles)
+        result.frames = run.frames
+        result.cycles = run.cycles
+        result.instructions = run.instructions
+        result.elapsed = run.elapsed
+        result.frameDigest = hashlib.sha1(
+            runner.emulator.GPU.screen.view
+        ).hexdigest()
+        result.memoryDigest = runner.memoryDigest()
+        result.serial = runner.emulator.SERIAL.text
+        result.verdict = runner.serialStop
+    except Exception:
+        result.elapsed = time.perf_counter() - started
+        result.error = traceback.format_exc().strip().splitlines()[-1]
+    return result
+
+
+def findROMs(paths):
+    """
+    expands directories into the ROM files they hold
+    @param paths list of files and directories
+    @return list
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(EXTENSIONS):
+                    found.append(os.path.join(path, name))
+        else:
+            found.append(path)
+    return found
+
+
+class Farm(object):
+    """
+    Runs ROMs in a process pool
+    """
+    def __init__(self, workers=None):
+        """
+        @param workers int processes, defaults to the number of cores
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, paths, frames=None, cycles=None, progress=None):
+        """
+        @param paths list of ROM files
+        @param frames int
+        @param cycles int m-cycles
+        @param progress callable(FarmResult) called as ROMs finish
+        @return list of FarmResult in the order of paths
+        """
+        if frames is None and cycles is None:
+            raise ValueError('Either frames or cycles limit is required')
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = dict(
+                (pool.submit(runROM, path, frames, cycles), path)
+                for path in paths
+            )
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # the worker died, not the emulation
+                    result = FarmResult(path)
+                    result.error = repr(e)
+                results[path] = result
+                if progress is not None:
+                    progress(result)
+        return [results[path] for path in paths]
+
+
+def report(results, fp):
+    """
+    writes a plain text summary
+    @param results list of FarmResult
+    @param fp text file
+    """
+    width = max([len(result.name) for result in results] + [3])
+    for result in results:
+        if result.error is not None:
+            status = 'ERROR  %s' % result.error
+        else:
+            status = '%7.2fs %5.2fx  %s' % (
+                result.elapsed, result.speed, result.frameDigest[:12]
+            )
+            if result.verdict:
+                status += '  %s' % result.verdict.upper()
+        fp.write('%-*s  %s\n' % (width, result.name, status))
+        serial = result.serial.strip()
+        if serial:
+            fp.write('%-*s  serial: %s\n' % (
+                width, '', ' '.join(serial.split())[-60:]
+            ))
+
+    errors = len([result for result in results if result.error])
+    failed = len([result for result in results if result.failed])
+    elapsed = sum(result.elapsed for result in results)
+    fp.write('%i ROMs, %i errors, %i failed, %.2fs worker time\n' % (
+        len(results), errors, failed, elapsed
+    ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m asec.farm',
+        description='Run ROMs headless on all cores and report results.'
+    )
+    parser.add_argument('paths', nargs='+', help='ROM files or directories')
+    parser.add_argument('--frames', type=int, default=None,
+                        help='number of video frames to run each ROM')
+    parser.add_argument('--cycles', type=int, default=None,
+                        help='number of T-cycles to run each ROM')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes, defaults to the core count')
+    parser.add_argument('--json', metavar='PATH', default=None,
+                        help='write the results as JSON')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)-15s\t%(levelname)-10s\t"
+               "%(name)-20s\t%(process)-5d\t%(message)s"
+    )
+
+    if args.frames is None and args.cycles is None:
+        args.frames = 600
+
+    paths = findROMs(args.paths)
+    if not paths:
+        parser.error('no ROMs found')
+
+    farm = Farm(args.workers)
+    results = farm.run(
+        paths, frames=args.frames,
+        cycles=None if args.cycles is None else (args.cycles + 3) // 4
+    )
+    report(results, sys.stdout)
+
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump([result.toDict() for result in results], fp, indent=2)
+
+    return 1 if any(not result.ok for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
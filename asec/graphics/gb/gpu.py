@@ -1,8 +1,11 @@
+import struct
 import logging
 
+from array import array
 from collections import defaultdict
 
 from asec.memory.ram import RAM
+from asec.interrupt.gb import InterruptController
 
 from asec.graphics.gb.palette import Palette
 from asec.graphics.gb.pixelrgbmapper import PixelRGBMapper
@@ -10,35 +13,93 @@ from asec.graphics.gb.screen import Screen
 from asec.utils.signal import Signal
 
 
+def _expandBits(byte):
+    """
+    spreads the 8 bits of a byte over the 8 bytes of an int, msb first
+    @param byte int
+    @return int
+    """
+    expanded = 0
+    for x in range(8):
+        if byte & (0x80 >> x):
+            expanded |= 1 << ((7 - x) << 3)
+    return expanded
+
+
+def _buildTileRows():
+    """
+    decoded pixel rows for every (low, high) bit plane pair,
+    row of planes low | high << 8 starts at offset (low | high << 8) << 3
+    @return bytes
+    """
+    planes = [_expandBits(i) for i in range(256)]
+    return b''.join(
+        (planes[low] | (planes[high] << 1)).to_bytes(8, 'big')
+        for high in range(256) for low in range(256)
+    )
+
+
+# 65536 x 8 decoded pixels (color numbers 0-3)
+TILE_ROWS = _buildTileRows()
+
+
 class GPU(object):
     """
     GameBoy graphics processor unit
     """
 
+    # Use bounds-checked, logging memory banks
+    CHECKED = False
+
+    # I/O registers, LCDC flags, tile and map bases, scroll, raster,
+    # interrupts, line, scan offset, mode and its start, 3 palettes
+    STATE = struct.Struct('<16B5B3H4BBIBq12I')
+    # y, x, tile, palette, yflip, xflip, priority
+    OBJECT_STATE = struct.Struct('<2h5B')
+
+    # Mode lengths, m-cycles: hblank, vblank (per line), OAM-read, VRAM-read
+    MODE_CLOCKS = (51, 114, 20, 43)
+
+    # A white line, drawn while the LCD or the background is off
+    BLANK_LINE = array('I', [Screen.BLANK]) * 160
+
+    # STAT interrupt enable bits, per mode and for LY=LYC
+    STAT_MODES = (0x08, 0x10, 0x20, 0x00)
+    STAT_LYC = 0x40
+
     def __init__(self, mainboard):
         self.mainboard = mainboard
         self.log = logging.getLogger(self.__class__.__name__)
 
+        self.scheduler = mainboard.scheduler
+        self.scheduler.register('gpu.mode', self._modeEvent)
+
         self.screen = Screen(self)
 
-        self.VRAM = RAM(0x2000)
-        self.ORAM = RAM(0xA0)
+        self.VRAM = RAM(0x2000, checked=self.CHECKED)
+        self.ORAM = RAM(0xA0, checked=self.CHECKED)
 
         self._reg = {}
 
         self.rgbMapper = PixelRGBMapper()
         self.palette = Palette()
 
-        self.tilemap = {}  # [512][8][8]
+        # decoded tiles, color number of pixel x, row y of tile t
+        # at (t << 6) | (y << 3) | x
+        self.tilemap = bytearray(512 * 64)
+        # tile rows (VRAM address >> 1) written since the last decode
+        self._dirtyRows = set()
 
         self._curline = 0
         self._curscan = 0
         self._linemode = 0
-        self._modeclocks = 0
+        self._modeStart = 0
         self._yscrl = 0
         self._xscrl = 0
         self._raster = 0
+        # STAT interrupt enable bits and the line they drive
         self._ints = 0
+        self._statLine = False
 
         self._lcdon = 0
         self._bgon = 0
@@ -62,11 +123,12 @@ class GPU(object):
         self._curline = 0
         self._curscan = 0
         self._linemode = 0
-        self._modeclocks = 0
+        self._modeStart = self.scheduler.now
         self._yscrl = 0
         self._xscrl = 0
         self._raster = 0
         self._ints = 0
+        self._statLine = False
 
         self._lcdon = 0
         self._bgon = 0
@@ -87,6 +149,7 @@ class GPU(object):
                 'num': i
             }) for i in range(40)
         ])
+        self._sortObjects()
         # self.tilemap = [[[0]*8]*8]*512
 
         # Set to values expected by BIOS, to start
@@ -100,166 +163,282 @@ class GPU(object):
 
         self.screen.reset()
 
-        # Cleaning tilemap
-        for i in range(512):
-            self.tilemap[i] = {}
-            for y in range(8):
-                self.tilemap[i][y] = {}
-                for x in range(8):
-                    self.tilemap[i][y][x] = 0
+        self.tilemap[:] = bytes(len(self.tilemap))
+        self._dirtyRows.clear()
+
+        self.scheduler.schedule(
+            'gpu.mode', self._modeStart + self.MODE_CLOCKS[self._linemode]
+        )
 
         self.renderScreen(self.screen)
         self.log.debug('reset')
 
-    def checkline(self):
-        self._modeclocks += self.mainboard.CPU.R.m
-
+    def saveState(self):
+        """
+        @return bytes, the mode event is saved with the scheduler
+        """
+        self.updateTiles()
+        palette = self.palette
+        state = [
+            self.STATE.pack(*(
+                [self._reg.get(i, 0) for i in range(16)] + [
+                    self._lcdon, self._bgon, self._objon, self._winon,
+                    self._objsize, self._bgtilebase, self._bgmapbase,
+                    self._wintilebase, self._yscrl, self._xscrl,
+                    self._raster, self._ints, self._curline, self._curscan,
+                    self._linemode, self._modeStart
+                ] +
+                [palette.bg[i] for i in range(4)] +
+                [palette.obj0[i] for i in range(4)] +
+                [palette.obj1[i] for i in range(4)]
+            ))
+        ]
+        for i in range(40):
+            obj = self._objdata[i]
+            state.append(self.OBJECT_STATE.pack(
+                obj['y'], obj['x'], obj['tile'], obj['palette'],
+                obj['yflip'], obj['xflip'], obj['prio']
+            ))
+        state.append(self.VRAM.dumps())
+        state.append(self.ORAM.dumps())
+        state.append(bytes(self.tilemap))
+        state.append(self.screen.saveState())
+        return b''.join(state)
+
+    def loadState(self, data):
+        """
+        @param data bytes from saveState()
+        """
+        values = self.STATE.unpack_from(data)
+        self._reg = dict(enumerate(values[:16]))
+        (
+            self._lcdon, self._bgon, self._objon, self._winon,
+            self._objsize, self._bgtilebase, self._bgmapbase,
+            self._wintilebase, self._yscrl, self._xscrl,
+            self._raster, self._ints, self._curline, self._curscan,
+            self._linemode, self._modeStart
+        ) = values[16:32]
+        self._statLine = self._statSignal()
+        for i in range(4):
+            self.palette.bg[i] = values[32 + i]
+            self.palette.obj0[i] = values[36 + i]
+            self.palette.obj1[i] = values[40 + i]
+        offset = self.STATE.size
+
+        for i in range(40):
+            obj = self._objdata[i]
+            (
+                obj['y'], obj['x'], obj['tile'], obj['palette'],
+                obj['yflip'], obj['xflip'], obj['prio']
+            ) = self.OBJECT_STATE.unpack_from(data, offset)
+            offset += self.OBJECT_STATE.size
+        self._sortObjects()
+
+        for bank in (self.VRAM, self.ORAM):
+            bank.loads(data[offset:offset + bank.size])
+            offset += bank.size
+        size = len(self.tilemap)
+        self.tilemap[:] = data[offset:offset + size]
+        self._dirtyRows.clear()
+        self.screen.loadState(data[offset + size:])
+
+    def _modeEvent(self, when):
+        """
+        end of the current LCD mode, scheduled at its exact m-cycle
+        @param when int
+        """
         if self._linemode == 0:  # In hblank
-            self.log.debug('checkline: In hblank')
-            if self._modeclocks >= 51:
-                # End of hblank for last scanline; render screen
-                if self._curline == 143:
-                    self._linemode = 1
-                    self.log.debug('Render screen')
-                    self.renderScreen(self.screen)
-                    self.mainboard.MMU.IF |= 1
-                else:
-                    self._linemode = 2
-
-                self._curline += 1
-                self._curscan += 640
-                self._modeclocks = 0
+            # End of hblank for last scanline; render screen
+            if self._curline == 143:
+                self._linemode = 1
+                self.screen.flip()
+                self.renderScreen(self.screen)
+                self.mainboard.INT.request(InterruptController.VBLANK)
+            else:
+                self._linemode = 2
+
+            self._curline += 1
+            self._curscan += 160
 
         elif self._linemode == 1:  # In vblank
-            self.log.debug('checkline: In vblank')
-            if self._modeclocks >= 114:
-                self._modeclocks = 0
-                self._curline += 1
+            self._curline += 1
 
-                if self._curline == 153:
-                    self._curline = 0
-                    self._curscan = 0
-                    self._linemode = 2
+            if self._curline > 153:
+                self._curline = 0
+                self._curscan = 0
+                self._linemode = 2
 
         elif self._linemode == 2:  # In OAM-read mode
-            self.log.debug('checkline: In OAM-read mode')
-            if self._modeclocks >= 20:
-                self._modeclocks = 0
-                self._linemode = 3
+            self._linemode = 3
 
-        elif self._linemode == 3:  # In VRAM-read mode
-            self.log.debug('checkline: In VRAM-read mode')
+        else:  # In VRAM-read mode
             # Render scanline at end of allotted time
-            if self._modeclocks >= 43:
-                self._modeclocks = 0
-                self._linemode = 0
-
-                if self._lcdon:
-                    if self._bgon:
-                        linebase = self._curscan
-                        mapbase = self._bgmapbase + ((((self._curline + self._yscrl) & 255) >> 3) << 5)
-                        y = (self._curline + self._yscrl) & 7
-                        x = self._xscrl & 7
-                        t = (self._xscrl >> 3) & 31
-                        w = 160
-
-                        if self._bgtilebase:
-                            tile = self.VRAM.readByte(mapbase + t)
-                            if tile < 128:
-                                tile += 256
-
-                            tilerow = self.tilemap[tile][y]
-                            while w:
-                                self._scanrow[160 - x] = tilerow[x]
-                                self.screen._pixels[linebase + 3] = self.palette.bg[tilerow[x]]
-
-                                x += 1
-
-                                if x == 8:
-                                    t = (t + 1) & 31
-                                    x = 0
-                                    tile = self.VRAM.readByte(mapbase + t)
-                                    if tile < 128:
-                                        tile += 256
-                                    tilerow = self.tilemap[tile][y]
-
-                                linebase += 4
-                                w -= 1
+            self._linemode = 0
+            self.renderScanline()
+
+        self._modeStart = when
+        self.scheduler.schedule(
+            'gpu.mode', when + self.MODE_CLOCKS[self._linemode]
+        )
+        self._updateStat()
+
+    def _statSignal(self):
+        """
+        @return bool, any enabled STAT interrupt source is active
+        """
+        return bool(
+            self._ints & self.STAT_MODES[self._linemode] or
+            self._ints & self.STAT_LYC and self._curline == self._raster
+        )
+
+    def _updateStat(self):
+        """
+        requests LCDSTAT when the STAT line rises, sources already active
+        do not request it again
+        """
+        signal = self._statSignal()
+        if signal and not self._statLine:
+            self.mainboard.INT.request(InterruptController.LCDSTAT)
+        self._statLine = signal
+
+    def renderScanline(self):
+        if self._dirtyRows:
+            self.updateTiles()
+
+        tiles = self.tilemap
+        vram = self.VRAM.buffer
+        pixels = self.screen.pixels
+
+        # both buffers are drawn in turn, so every line is drawn even with
+        # the LCD off, or the last two frames would alternate
+        if not self._lcdon:
+            pixels[self._curscan:self._curscan + 160] = self.BLANK_LINE
+            return
+
+        if self._bgon:
+            linebase = self._curscan
+            mapbase = self._bgmapbase + ((((self._curline + self._yscrl) & 255) >> 3) << 5)
+            y = ((self._curline + self._yscrl) & 7) << 3
+            x = self._xscrl & 7
+            t = (self._xscrl >> 3) & 31
+            w = 160
+
+            if self._bgtilebase:
+                tile = vram[mapbase + t]
+                if tile < 128:
+                    tile += 256
+
+                tilerow = (tile << 6) | y
+                while w:
+                    self._scanrow[160 - w] = tiles[tilerow + x]
+                    pixels[linebase] = self.palette.bg[tiles[tilerow + x]]
+
+                    x += 1
+
+                    if x == 8:
+                        t = (t + 1) & 31
+                        x = 0
+                        tile = vram[mapbase + t]
+                        if tile < 128:
+                            tile += 256
+                        tilerow = (tile << 6) | y
+
+                    linebase += 1
+                    w -= 1
+            else:
+                tilerow = (vram[mapbase + t] << 6) | y
+                while w:
+                    self._scanrow[160 - w] = tiles[tilerow + x]
+                    pixels[linebase] = self.palette.bg[tiles[tilerow + x]]
+
+                    x += 1
+
+                    if x == 8:
+                        t = (t + 1) & 31
+                        x = 0
+                        tilerow = (vram[mapbase + t] << 6) | y
+
+                    linebase += 1
+                    w -= 1
+        else:
+            # white under the sprites, none of them is hidden behind it
+            pixels[self._curscan:self._curscan + 160] = self.BLANK_LINE
+            for x in range(160):
+                self._scanrow[x] = 0
+
+        if self._objon:
+            cnt = 0
+            if self._objsize:
+                for i in range(40):
+                    # What do i do here?
+                    pass
+            else:
+                linebase = self._curscan
+                for i in range(40):
+                    obj = self._objdatasorted[i]
+                    if obj['y'] <= self._curline \
+                       and (obj['y'] + 8) > self._curline:
+                        if obj['yflip']:
+                            tilerow = (obj['tile'] << 6) | ((7 - (self._curline - obj['y'])) << 3)
                         else:
-                            tilerow = self.tilemap[self.VRAM.readByte(mapbase + t)][y]
-                            while w:
-                                self._scanrow[160 - x] = tilerow[x]
-                                self.screen._pixels[linebase + 3] = self.palette.bg[tilerow[x]]
-
-                                x += 1
-
-                                if x == 8:
-                                    t = (t + 1) & 31
-                                    x = 0
-                                    tilerow = self.tilemap[self.VRAM.readByte(mapbase + t)][y]
-
-                                linebase += 4
-                                w -= 1
-
-                    if self._objon:
-                        cnt = 0
-                        if self._objsize:
-                            for i in range(40):
-                                # What do i do here?
-                                pass
+                            tilerow = (obj['tile'] << 6) | ((self._curline - obj['y']) << 3)
+
+                        if obj['palette']:
+                            pal = self.palette.obj1
                         else:
-                            linebase = self._curscan
-                            for i in range(40):
-                                obj = self._objdatasorted[i]
-                                if obj['y'] <= self._curline \
-                                   and (obj['y'] + 8) > self._curline:
-                                    if obj['yflip']:
-                                        tilerow = self.tilemap[obj['tile']][7 - (self._curline - obj['y'])]
-                                    else:
-                                        tilerow = self.tilemap[obj['tile']][self._curline - obj['y']]
-
-                                    if obj['palette']:
-                                        pal = self.palette.obj1
-                                    else:
-                                        pal = self.palette.obj0
-
-                                    linebase = (self._curline * 160 + obj['x']) * 4
-                                    if obj['xflip']:
-                                        for x in range(8):
-                                            if obj['x'] + x >= 0 and obj['x'] + x < 160:
-                                                if tilerow[7 - x] and (obj['prio'] or not self._scanrow[x]):
-                                                    self.screen._pixels[linebase + 3] = pal[tilerow[7 - x]]
-
-                                            linebase += 4
-                                    else:
-                                        for x in range(8):
-                                            if obj['x'] + x >= 0 and obj['x'] + x < 160:
-                                                if tilerow[x] and (obj['prio'] or not self._scanrow[x]):
-                                                    self.screen._pixels[linebase + 3] = pal[tilerow[x]]
-
-                                            linebase += 4
-
-                                    cnt += 1
-                                    if cnt > 10:
-                                        break
-
-    def updateTile(self, address, value):
-        saddr = address
-        if address & 1:
-            saddr -= 1
-            address -= 1
-
-        tile = (address >> 4) & 511
-        y = (address >> 1) & 7
-
-        self.log.debug('updateTile', address, value, tile, y, saddr)
-
-        for x in range(8):
-            sx = 1 << (7 - x)
-            self.tilemap[tile][y][x] = 2 \
-                if (
-                    1 if self.VRAM.readByte(saddr) & sx else 0
-                ) | (self.VRAM.readByte(saddr + 1) & sx) else 0
+                            pal = self.palette.obj0
+
+                        linebase = self._curline * 160 + obj['x']
+                        if obj['xflip']:
+                            for x in range(8):
+                                if obj['x'] + x >= 0 and obj['x'] + x < 160:
+                                    if tiles[tilerow + 7 - x] and (obj['prio'] or not self._scanrow[obj['x'] + x]):
+                                        pixels[linebase] = pal[tiles[tilerow + 7 - x]]
+
+                                linebase += 1
+                        else:
+                            for x in range(8):
+                                if obj['x'] + x >= 0 and obj['x'] + x < 160:
+                                    if tiles[tilerow + x] and (obj['prio'] or not self._scanrow[obj['x'] + x]):
+                                        pixels[linebase] = pal[tiles[tilerow + x]]
+
+                                linebase += 1
+
+                        cnt += 1
+                        if cnt > 10:
+                            break
+
+    def writeVRAM(self, address, value):
+        """
+        tile data write, the decoded tile row is refreshed before the next
+        scanline is rendered
+        @param address int VRAM offset, below 0x1800
+        @param value int
+        """
+        vram = self.VRAM.buffer
+        if vram[address] != value:
+            vram[address] = value
+            self._dirtyRows.add(address >> 1)
+
+    def updateTiles(self):
+        """
+        decodes the tile rows written since the last call
+        """
+        for row in self._dirtyRows:
+            self.updateTile(row << 1)
+        self._dirtyRows.clear()
+
+    def updateTile(self, address):
+        """
+        decodes the tile row holding VRAM offset `address`
+        @param address int
+        """
+        vram = self.VRAM.buffer
+        address &= 0x1FFE
+        offset = (vram[address] | (vram[address + 1] << 8)) << 3
+        # 16 bytes per tile, 2 per row: row offset in tilemap is address << 2
+        self.tilemap[address << 2:(address << 2) + 8] = \
+            TILE_ROWS[offset:offset + 8]
 
     def updateORAM(self, address, value):
         address -= 0xFE00
@@ -281,18 +460,15 @@ class GPU(object):
                 self._objdata[obj]['yflip'] = 1 if value & 0x40 else 0
                 self._objdata[obj]['prio'] = 1 if value & 0x80 else 0
 
-        def compare(a, b):
-            return -1 if a['x'] > b['x'] else -1 if a['num'] > b['num'] else 1
+        self._sortObjects()
 
-        self._objdatasorted = sorted(self._objdata, compare)
+    def _sortObjects(self):
+        self._objdatasorted = sorted(
+            self._objdata.values(),
+            key=lambda obj: (-obj['x'], -obj['num'])
+        )
 
     def readByte(self, address):
-        value = self._readByte(address)
-        self.log.debug("[0x%06X] >> 0x%06X", address, value)
-        return value
-
-    def _readByte(self, address):
-        self.log.debug('readByte 0x%04X', address)
         gaddr = address - 0xFF40
         if gaddr == 0:
             return (0x80 if self._lcdon else 0) | \
@@ -302,7 +478,8 @@ class GPU(object):
                    (0x02 if self._objon else 0) | \
                    (0x01 if self._bgon else 0)
         elif gaddr == 1:
-            return (4 if self._curline == self._raster else 0) | self._linemode
+            return 0x80 | self._ints | \
+                   (4 if self._curline == self._raster else 0) | self._linemode
         elif gaddr == 2:
             return self._yscrl
         elif gaddr == 3:
@@ -315,7 +492,6 @@ class GPU(object):
             return self._reg.get(gaddr, 0)
 
     def writeByte(self, address, value):
-        self.log.debug('writeByte 0x%04X on 0x%04X', value, address)
         gaddr = address - 0xFF40
         self._reg[gaddr] = value
 
@@ -327,6 +503,10 @@ class GPU(object):
             self._objon = 1 if value & 0x02 else 0
             self._bgon = 1 if value & 0x01 else 0
 
+        elif gaddr == 1:
+            self._ints = value & 0x78
+            self._updateStat()
+
         elif gaddr == 2:
             self._yscrl = value
 
@@ -335,54 +515,56 @@ class GPU(object):
 
         elif gaddr == 5:
             self._raster = value
+            self._updateStat()
 
         # OAM DMA
         elif gaddr == 6:
-            self.log.debug('writeByte: OAM DNA')
             for i in range(160):
-                v = self.readByte((value << 8) + i)
-                self.log.debug('WriteByte ORAM DMA', i, v)
+                v = self.mainboard.MMU.readByte((value << 8) + i)
                 self.ORAM.writeByte(i, v)
                 self.updateORAM(0xFE00 + i, v)
 
         # BG palette mapping
         elif gaddr == 7:
-            self.log.debug('writeByte: BG Palette mapping')
             for i in range(4):
-                z = (value >> (i * 2)) & 3
-                if z == 0:
-                    self.palette.bg[i] = 255
-                elif z == 1:
-                    self.palette.bg[i] = 192
-                elif z == 2:
-                    self.palette.bg[i] = 96
-                elif z == 3:
-                    self.palette.bg[i] = 0
+                self.palette.bg[i] = Palette.SHADES[(value >> (i * 2)) & 3]
 
         # OBJ0 palette mapping
         elif gaddr == 8:
-            self.log.debug('writeByte: JBJ0 Palette mapping')
             for i in range(4):
-                z = (value >> (i * 2)) & 3
-                if z == 0:
-                    self.palette.obj0[i] = 255
-                elif z == 1:
-                    self.palette.obj0[i] = 192
-                elif z == 2:
-                    self.palette.obj0[i] = 96
-                elif z == 3:
-                    self.palette.obj0[i] = 0
+                self.palette.obj0[i] = Palette.SHADES[(value >> (i * 2)) & 3]
 
         # OBJ1 palette mapping
         elif gaddr == 9:
-            self.log.debug('writeByte: OBJ1 Palette mapping')
             for i in range(4):
-                z = (value >> (i * 2)) & 3
-                if z == 0:
-                    self.palette.obj1[i] = 255
-                elif z == 1:
-                    self.palette.obj1[i] = 192
-                elif z == 2:
-                    self.palette.obj1[i] = 96
-                elif z == 3:
-                    self.palette.obj1[i] = 0
+                self.palette.obj1[i] = Palette.SHADES[(value >> (i * 2)) & 3]
+
+
+class DebugGPU(GPU):
+    """
+    GPU logging mode changes and register accesses
+    """
+    CHECKED = True
+
+    MODES = {0: 'hblank', 1: 'vblank', 2: 'OAM-read', 3: 'VRAM-read'}
+
+    def _modeEvent(self, when):
+        mode = self._linemode
+        super(DebugGPU, self)._modeEvent(when)
+        self.log.debug(
+            'mode: line %i, %s -> %s at %i', self._curline,
+            self.MODES[mode], self.MODES[self._linemode], when
+        )
+
+    def writeVRAM(self, address, value):
+        self.log.debug('writeVRAM 0x%04X << 0x%02X', address, value)
+        super(DebugGPU, self).writeVRAM(address, value)
+
+    def readByte(self, address):
+        value = super(DebugGPU, self).readByte(address)
+        self.log.debug("[0x%06X] >> 0x%06X", address, value)
+        return value
+
+    def writeByte(self, address, value):
+        self.log.debug("[0x%06X] << 0x%06X", address, value)
+        super(DebugGPU, self).writeByte(address, value)
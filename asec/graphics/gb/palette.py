@@ -1,4 +1,7 @@
 class Palette:
+    # Packed 0xAARRGGBB color per shade, white to black
+    SHADES = (0xFFFFFFFF, 0xFFC0C0C0, 0xFF606060, 0xFF000000)
+
     def __init__(self):
         self.bg = {}
         self.obj0 = {}
@@ -8,4 +11,4 @@ class Palette:
 
     def reset(self):
         for i in range(4):
-            self.bg[i] = self.obj0[i] = self.obj1[i] = 0xFF
+            self.bg[i] = self.obj0[i] = self.obj1[i] = self.SHADES[0]
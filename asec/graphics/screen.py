@@ -1,22 +1,102 @@
-from asec.graphics.pixel import Pixel
+import sys
+from array import array
 
 
 class Screen(object):
+    """
+    Framebuffer of packed 0xAARRGGBB pixels, row-major.
+
+    In memory (little-endian) every pixel is laid out as B, G, R, A bytes,
+    which is what QImage.Format_RGB32 and 'BGRA' surfaces expect, so the
+    buffer can be handed to front-ends without conversion.
+
+    Double-buffered: the GPU draws into `pixels` (back buffer) and calls
+    flip() once a frame is complete; front-ends only read the front buffer.
+    """
+    # Opaque white
+    BLANK = 0xFFFFFFFF
+
     def __init__(self, pixel_w, pixel_h):
         self._width = pixel_w
         self._height = pixel_h
 
-        self._pixels = {}
+        self._blank = array('I', [self.BLANK]) * (pixel_w * pixel_h)
+        self._buffers = (array('I', self._blank), array('I', self._blank))
+        self._views = tuple(
+            memoryview(buffer).cast('B') for buffer in self._buffers
+        )
+
+        self._frontIndex = 0
+        self._pixels = self._buffers[1]
+        self._view = self._views[0]
         self.reset()
 
     def reset(self):
-        for i in range(self.width * self.height):
-            self._pixels[i] = Pixel(255, 255, 255)
+        for buffer in self._buffers:
+            buffer[:] = self._blank
+
+    def saveState(self):
+        """
+        @return bytes front buffer index, then both buffers
+        """
+        return bytes((self._frontIndex,)) + \
+            bytes(self._views[0]) + bytes(self._views[1])
+
+    def loadState(self, data):
+        """
+        @param data bytes from saveState()
+        """
+        size = len(self._views[0])
+        self._views[0][:] = data[1:1 + size]
+        self._views[1][:] = data[1 + size:1 + 2 * size]
+        if data[0] != self._frontIndex:
+            self.flip()
+
+    def flip(self):
+        """
+        presents the back buffer, drawing continues in the other one
+        """
+        self._frontIndex ^= 1
+        self._view = self._views[self._frontIndex]
+        self._pixels = self._buffers[self._frontIndex ^ 1]
 
     @property
     def pixels(self):
+        """
+        back buffer, pixel x, y is at x + y * width
+        @return array
+        """
         return self._pixels
 
+    @property
+    def front(self):
+        """
+        last complete frame
+        @return array
+        """
+        return self._buffers[self._frontIndex]
+
+    @property
+    def view(self):
+        """
+        zero-copy byte view of the front buffer, 4 bytes per pixel
+        @return memoryview
+        """
+        return self._view
+
+    @property
+    def views(self):
+        """
+        byte views of both buffers, front-ends may wrap them once
+        and pick views[frontIndex] on every frame
+        @return tuple
+        """
+        return self._views
+
+    @property
+    def frontIndex(self):
+        return self._frontIndex
+
     @property
     def width(self):
         return self._width
@@ -27,17 +107,34 @@ class Screen(object):
 
     def toImage(self):
         from PIL import Image
-        img = Image.new('RGB', (self.width, self.height))
-        for x in range(self.width):
-            for y in range(self.height):
-                img.putpixel((x, y), self._pixels[x+(self.width*y)].hex)
-        return img
+        return Image.frombuffer(
+            'RGB', (self.width, self.height), self._view, 'raw',
+            'BGRX' if sys.byteorder == 'little' else 'XRGB', 0, 1
+        )
+
+    def toBytes(self):
+        """
+        row-major packed RGB, 3 bytes per pixel
+        @return bytes
+        """
+        if sys.byteorder == 'little':
+            red, green, blue = 2, 1, 0
+        else:
+            red, green, blue = 1, 2, 3
+
+        view = self._view
+        data = bytearray(self.width * self.height * 3)
+        data[0::3] = view[red::4]
+        data[1::3] = view[green::4]
+        data[2::3] = view[blue::4]
+        return bytes(data)
 
     def toDataArray(self):
         data = []
         for x in range(self.width):
             for y in range(self.height):
-                data.append(self._pixels[x+(self.width*y)].red)
-                data.append(self._pixels[x+(self.width*y)].green)
-                data.append(self._pixels[x+(self.width*y)].blue)
+                pixel = self.front[x+(self.width*y)]
+                data.append((pixel >> 16) & 0xFF)
+                data.append((pixel >> 8) & 0xFF)
+                data.append(pixel & 0xFF)
         return data
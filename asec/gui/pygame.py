@@ -3,8 +3,12 @@ import pygame
 import time
 import sys
 import logging
+import argparse
 
 from asec.rom import Loader
+from asec.device import Rewind
+from asec.input.gb.keyboard import Keyboard
+from asec.input.movie import MovieRecorder
 
 
 logging.basicConfig(
@@ -18,6 +22,21 @@ logger = logging.getLogger(__name__)
 
 white = (255, 255, 255)
 
+# pygame keys to the key codes of Keyboard.KEYMAP
+KEYS = {
+    pygame.K_UP: Keyboard.KEYMAP['UP'],
+    pygame.K_DOWN: Keyboard.KEYMAP['DOWN'],
+    pygame.K_LEFT: Keyboard.KEYMAP['LEFT'],
+    pygame.K_RIGHT: Keyboard.KEYMAP['RIGHT'],
+    pygame.K_a: Keyboard.KEYMAP['A'],
+    pygame.K_s: Keyboard.KEYMAP['B'],
+    pygame.K_RETURN: Keyboard.KEYMAP['START'],
+    pygame.K_SPACE: Keyboard.KEYMAP['SELECT'],
+}
+
+# steps back in time while held
+REWIND_KEY = pygame.K_BACKSPACE
+
 last_redraw = time.time()
 
 
@@ -25,19 +44,22 @@ def main():
     global last_redraw
     pygame.init()
     window = None
+    # surfaces sharing the screen buffers, one per buffer
+    surfaces = []
 
     def redraw(screen):
         global last_redraw
         _fps = 1000/(time.time()-last_redraw)
         last_redraw = time.time()
 
-        image = screen.toImage()
-        mode = image.mode
-        size = image.size
-        data = image.tostring()
+        if not surfaces:
+            surfaces.extend(
+                pygame.image.frombuffer(
+                    view, (screen.width, screen.height), 'BGRA'
+                ) for view in screen.views
+            )
 
-        last_screen = pygame.image.fromstring(data, size, mode)
-        window.blit(last_screen, (0, 0))
+        window.blit(surfaces[screen.frontIndex], (0, 0))
 
         myfont = pygame.font.SysFont("monospace", 15)
         label = myfont.render("FPS: %d" % _fps, 1, (255,255,0))
@@ -45,10 +67,17 @@ def main():
 
         pygame.display.flip()
 
-    if len(sys.argv) == 2:
-        loader = Loader(sys.argv[1])
+    parser = argparse.ArgumentParser(prog='python -m asec.gui.pygame')
+    parser.add_argument('rom', nargs='?', default=None, help='path to ROM')
+    parser.add_argument('--record', metavar='PATH', default=None,
+                        help='record the input as a movie, saved on quit')
+    args = parser.parse_args()
+
+    if args.rom:
+        loader = Loader(args.rom)
         loader.read()
-        emulator = loader.loader.emulator()
+        # movies start from the same RAM, not from the save file
+        emulator = loader.loader.emulator(battery=not args.record)
         pygame.display.set_caption(loader.name)
         window = pygame.display.set_mode(
             (emulator.GPU.screen.width, emulator.GPU.screen.height),
@@ -60,15 +89,33 @@ def main():
         pygame.quit()
         sys.exit()
 
+    # keys go through the recorder when recording
+    recorder = MovieRecorder(emulator) if args.record else None
+    keys = recorder or emulator.KEY
+    # a movie can not go back in time
+    rewind = None if recorder else Rewind(emulator)
+
     while (True):
 
         # check for quit events
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if recorder is not None:
+                    with open(args.record, 'w') as fp:
+                        recorder.movie.save(fp)
+                emulator.close()
                 pygame.quit()
                 sys.exit()
-
-        emulator.frame()
+            elif event.type == pygame.KEYDOWN and event.key in KEYS:
+                keys.press(KEYS[event.key])
+            elif event.type == pygame.KEYUP and event.key in KEYS:
+                keys.release(KEYS[event.key])
+            elif event.type in (pygame.KEYDOWN, pygame.KEYUP) and \
+                    event.key == REWIND_KEY and rewind is not None:
+                rewind.hold(event.type == pygame.KEYDOWN)
+
+        # steps back at the end of the frame while the rewind key is held
+        emulator.run_frame()
 
 
 if __name__ == '__main__':
@@ -1,6 +1,7 @@
 import os
 import sys
 import time
+import argparse
 import threading
 
 try:
@@ -25,6 +26,23 @@ except ImportError:
     sys.exit(-1)
 
 from asec.rom import Loader
+from asec.device import Rewind
+from asec.input.gb.keyboard import Keyboard
+from asec.input.movie import MovieRecorder
+
+
+# Qt keys to the key codes of Keyboard.KEYMAP, others go through as they are
+KEYS = {
+    Qt.Key_Up: Keyboard.KEYMAP['UP'],
+    Qt.Key_Down: Keyboard.KEYMAP['DOWN'],
+    Qt.Key_Left: Keyboard.KEYMAP['LEFT'],
+    Qt.Key_Right: Keyboard.KEYMAP['RIGHT'],
+    Qt.Key_Return: Keyboard.KEYMAP['START'],
+    Qt.Key_Enter: Keyboard.KEYMAP['START'],
+}
+
+# steps back in time while held
+REWIND_KEY = Qt.Key_Backspace
 
 
 class Timer(threading.Thread):
@@ -51,12 +69,18 @@ class Timer(threading.Thread):
 
 
 class ViewQImage(QImage):
-    def __init__(self, screen):
+    """
+    QImage sharing one of the screen buffers, no copy
+    """
+    def __init__(self, screen, index):
+        view = screen.views[index]
         super(ViewQImage, self).__init__(
-            screen.toImage().tostring(),
+            view,
             screen.width, screen.height,
             QImage.Format_RGB32
         )
+        # keep the buffer alive as long as the image
+        self._buffer = view
 
 
 class Screen(QWidget):
@@ -69,14 +93,28 @@ class Screen(QWidget):
 
         self._fps = 0
         self._image = None
+        self._images = ()
         self._last_redraw = time.time()
         # self._redraw_timer = Timer(.03, lambda: self.repaint())
         # self._redraw_timer.start()
 
         self._repainting = False
 
-    def setEmulator(self, emulator):
+    def setEmulator(self, emulator, record=None):
+        """
+        @param emulator Device, freshly reset
+        @param record str movie file to record the input to
+        """
         self.emulator = emulator
+        # keys go through the recorder when recording
+        self.recorder = None
+        self.record = record
+        self.input = emulator.KEY
+        if record:
+            self.recorder = self.input = MovieRecorder(emulator)
+        # a movie can not go back in time; the emulation thread steps back
+        # between its frames
+        self.rewind = None if record else Rewind(emulator)
         self.setScreen(self.emulator.GPU.screen)
         self.emulator.GPU.renderScreen.connect(self.redraw)
         self.emulator.start()
@@ -84,12 +122,13 @@ class Screen(QWidget):
     def setScreen(self, screen):
         self.screenX = screen.width
         self.screenY = screen.height
+        self._images = (ViewQImage(screen, 0), ViewQImage(screen, 1))
         self.resize(self.screenX, self.screenY)
 
     def redraw(self, screen):
         current = int(time.time() * 1000)
         self._fps = 1000/(current - self._last_redraw)
-        self._image = ViewQImage(screen)
+        self._image = self._images[screen.frontIndex]
         self._last_redraw = current
         # self.update()
         self.repaint()
@@ -114,13 +153,21 @@ class Screen(QWidget):
         self._repainting = False
 
     def keyPressEvent(self, event):
-        self.emulator.KEY.press(event.key())
+        if event.key() == REWIND_KEY:
+            if self.rewind is not None and not event.isAutoRepeat():
+                self.rewind.hold(True)
+            return
+        self.input.press(KEYS.get(event.key(), event.key()))
         if event.key() == Qt.Key_Escape:
             self.pause()
         print(event.key(), self.emulator.KEY.colidX, self.emulator.KEY.keys)
 
     def keyReleaseEvent(self, event):
-        self.emulator.KEY.release(event.key())
+        if event.key() == REWIND_KEY:
+            if self.rewind is not None and not event.isAutoRepeat():
+                self.rewind.hold(False)
+            return
+        self.input.release(KEYS.get(event.key(), event.key()))
         if event.key() == Qt.Key_Escape:
             self.play()
         print(event.key(), self.emulator.KEY.colidX, self.emulator.KEY.keys)
@@ -145,6 +192,9 @@ class Screen(QWidget):
 
     def closeEvent(self, event):
         self.pause()
+        if self.recorder is not None:
+            with open(self.record, 'w') as fp:
+                self.recorder.movie.save(fp)
         # self.emulator._loop = False
         # self.emulator._stop()
         # self._redraw_timer.stop()
@@ -223,6 +273,8 @@ class MainWindow(QMainWindow):
         super(MainWindow, self).__init__()
 
         self.curFile = ''
+        # movie file to record the next game to
+        self.record = None
 
         self.rom_chooser = ROMChooser(self)
         self.setCentralWidget(self.rom_chooser)
@@ -257,10 +309,11 @@ class MainWindow(QMainWindow):
             loader = Loader(self.curFile)
             loader.read()
 
-            emulator = loader.loader.emulator()
+            # movies start from the same RAM, not from the save file
+            emulator = loader.loader.emulator(battery=not self.record)
             screen = Screen(None)
             screen.info = loader
-            screen.setEmulator(emulator)
+            screen.setEmulator(emulator, self.record)
             # emulator.GPU.setRedrawCallback(screen.redraw)
             screen.show()
             screen.setWindowTitle(loader.name)
@@ -279,11 +332,18 @@ def main():
                "%(name)-20s\t%(process)-5d\t%(message)s"
     )
 
-    application = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(prog='python -m asec.gui.qt')
+    parser.add_argument('rom', nargs='?', default=None, help='path to ROM')
+    parser.add_argument('--record', metavar='PATH', default=None,
+                        help='record the input as a movie, saved on close')
+    args, qtArgs = parser.parse_known_args()
+
+    application = QApplication(sys.argv[:1] + qtArgs)
     mw = MainWindow()
+    mw.record = args.record
 
-    if len(sys.argv) == 2:
-        mw.setCurrentFile(sys.argv[1])
+    if args.rom:
+        mw.setCurrentFile(args.rom)
     else:
         mw.show()
 
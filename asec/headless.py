@@ -0,0 +1,315 @@
+"""
+Headless runner: executes emulated video frames as fast as possible,
+without any display front-end.
+
+Usage:
+    python -m asec.headless rom.gb --frames 6000
+    python -m asec.headless rom.gb --frames 600 --save-state run.state
+    python -m asec.headless rom.gb --frames 600 --load-state run.state
+    python -m asec.headless rom.gb --frames 3600 --record run.movie
+    python -m asec.headless rom.gb --replay run.movie
+    python -m asec.headless roms.zip --member tetris.gb --frames 600
+"""
+import sys
+import time
+import hashlib
+import logging
+import argparse
+
+from asec.rom import Loader
+from asec.asset.gb import FRAME_CYCLES
+from asec.input.movie import Movie, MovieRecorder, MoviePlayer
+
+# Real-time CPU speed, T-cycles per second
+CPU_FREQUENCY = 4194304
+
+# Serial output test ROMs end their report with
+TEST_PASSED = 'Passed'
+TEST_FAILED = 'Failed'
+TEST_RESULTS = (TEST_PASSED, TEST_FAILED)
+
+
+class RunResult(object):
+    def __init__(self, frames, cycles, instructions, elapsed):
+        self.frames = frames
+        self.cycles = cycles  # m-cycles
+        self.instructions = instructions
+        self.elapsed = elapsed
+
+    @property
+    def tcycles(self):
+        return self.cycles * 4
+
+    @property
+    def cyclesPerSecond(self):
+        return self.tcycles / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def instructionsPerSecond(self):
+        return self.instructions / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def framesPerSecond(self):
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def speed(self):
+        """
+        ratio to the real-time GameBoy speed
+        @return float
+        """
+        return self.cyclesPerSecond / CPU_FREQUENCY
+
+
+class HeadlessRunner(object):
+    """
+    Steps a Device whole video frames at a time, no display required
+    """
+
+    def __init__(self, emulator):
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.emulator = emulator
+
+        self.frames = 0
+        self.instructions = 0
+
+        # serial output to stop at, and the one that stopped the run
+        self._serialStops = ()
+        self.serialStop = None
+
+    @classmethod
+    def fromFile(cls, romFileName, debug=None, battery=True, member=None):
+        """
+        @param romFileName str ROM file or archive
+        @param debug bool
+        @param battery bool keep battery-backed RAM in the save file next
+                            to the ROM, off for reproducible runs
+        @param member str ROM to run from an archive holding several
+        @return HeadlessRunner
+        """
+        loader = Loader(romFileName, member=member)
+        loader.read()
+        return cls(loader.loader.emulator(debug=debug, battery=battery))
+
+    def stopOnSerial(self, patterns=TEST_RESULTS):
+        """
+        pauses the emulator as soon as the serial output ends with one
+        of the patterns
+        @param patterns tuple of str
+        """
+        self._serialStops = tuple(pattern.encode() for pattern in patterns)
+        self.emulator.SERIAL.transmitted.connect(self._serialByte)
+
+    def _serialByte(self, value):
+        output = self.emulator.SERIAL.output
+        for pattern in self._serialStops:
+            if output.endswith(pattern):
+                self.serialStop = pattern.decode()
+                self.emulator.pause()
+                break
+
+    def runFrame(self):
+        """
+        executes instructions until one LCD frame worth of cycles elapsed
+        @return int executed instructions
+        """
+        result = self.emulator.run_frame()
+        self.frames += 1
+        self.instructions += result.instructions
+        return result.instructions
+
+    def run(self, frames=None, cycles=None):
+        """
+        runs until the frame or the cycle (m-cycles) limit is reached,
+        whichever comes first
+        @param frames int
+        @param cycles int
+        @return RunResult
+        """
+        if frames is None and cycles is None:
+            raise ValueError('Either frames or cycles limit is required')
+
+        emulator = self.emulator
+        startClock = emulator.CPU.CLOCK.m
+        startFrames = self.frames
+        startInstructions = self.instructions
+
+        emulator.CPU._STOP = 0
+        started = time.perf_counter()
+        while not emulator.CPU._STOP:
+            if frames is not None and self.frames - startFrames >= frames:
+                break
+            if cycles is not None and \
+               emulator.CPU.CLOCK.m - startClock >= cycles:
+                break
+            self.runFrame()
+        elapsed = time.perf_counter() - started
+
+        return RunResult(
+            self.frames - startFrames,
+            emulator.CPU.CLOCK.m - startClock,
+            self.instructions - startInstructions,
+            elapsed
+        )
+
+    def dumpFrame(self, fp):
+        """
+        writes the current framebuffer as binary PPM (P6)
+        @param fp file
+        """
+        screen = self.emulator.GPU.screen
+        fp.write(b'P6\n%d %d\n255\n' % (screen.width, screen.height))
+        fp.write(screen.toBytes())
+
+    def saveState(self, fp):
+        """
+        writes a save state, to resume the run elsewhere with loadState()
+        @param fp file
+        """
+        fp.write(self.emulator.save_state())
+
+    def loadState(self, fp):
+        """
+        @param fp file
+        """
+        self.emulator.load_state(fp.read())
+
+    def memoryDigest(self):
+        """
+        SHA-1 over the emulator RAM contents
+        @return str
+        """
+        digest = hashlib.sha1()
+        for bank in (
+            self.emulator.MMU.WRAM,
+            self.emulator.MMU.ZRAM,
+            self.emulator.MMU.ERAM,
+            self.emulator.GPU.VRAM,
+            self.emulator.GPU.ORAM
+        ):
+            digest.update(bank.dumps())
+        return digest.hexdigest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m asec.headless',
+        description='Run a ROM without display as fast as possible.'
+    )
+    parser.add_argument('rom', help='path to ROM, or a gzip/zip archive')
+    parser.add_argument('--member', metavar='NAME', default=None,
+                        help='ROM to run from a zip archive holding several')
+    parser.add_argument('--frames', type=int, default=None,
+                        help='number of video frames to run')
+    parser.add_argument('--cycles', type=int, default=None,
+                        help='number of T-cycles to run')
+    parser.add_argument('--dump-frame', metavar='PATH', default=None,
+                        help='write the final framebuffer as PPM')
+    parser.add_argument('--load-state', metavar='PATH', default=None,
+                        help='resume from a save state')
+    parser.add_argument('--save-state', metavar='PATH', default=None,
+                        help='write a save state at the end of the run')
+    parser.add_argument('--until', metavar='TEXT', action='append',
+                        default=None,
+                        help='stop once the serial output ends with TEXT, '
+                             'defaults to "Passed" and "Failed"')
+    parser.add_argument('--record', metavar='PATH', default=None,
+                        help='write a movie with framebuffer checkpoints')
+    parser.add_argument('--checkpoints', type=int, default=60, metavar='N',
+                        help='frames between recorded checkpoints')
+    parser.add_argument('--replay', metavar='PATH', default=None,
+                        help='replay a movie, stop at the first divergence')
+    parser.add_argument('--no-battery', dest='battery', action='store_false',
+                        help='do not load or write the cartridge save file')
+    parser.add_argument('--debug', action='store_true', default=None,
+                        help='use the instrumented, logging components')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)-15s\t%(levelname)-10s\t"
+               "%(name)-20s\t%(process)-5d\t%(message)s"
+    )
+
+    if args.load_state and (args.record or args.replay):
+        parser.error('movies start at power-on, not from a save state')
+
+    movie = None
+    if args.replay:
+        with open(args.replay) as fp:
+            movie = Movie.load(fp)
+        if args.frames is None and args.cycles is None:
+            args.frames = movie.frames
+
+    if args.frames is None and args.cycles is None:
+        args.frames = 60
+
+    # movies replay from power-on, so they never see the save file
+    if args.record or args.replay:
+        args.battery = False
+
+    runner = HeadlessRunner.fromFile(
+        args.rom, debug=args.debug, battery=args.battery, member=args.member
+    )
+    try:
+        return _run(runner, args, movie)
+    finally:
+        runner.emulator.close()
+
+
+def _run(runner, args, movie):
+    runner.stopOnSerial(args.until or TEST_RESULTS)
+    if args.load_state:
+        with open(args.load_state, 'rb') as fp:
+            runner.loadState(fp)
+
+    recorder = player = None
+    if args.record:
+        recorder = MovieRecorder(
+            runner.emulator, checkpoints=args.checkpoints
+        )
+    if movie is not None:
+        player = MoviePlayer(runner.emulator, movie)
+
+    result = runner.run(
+        frames=args.frames,
+        cycles=None if args.cycles is None else (args.cycles + 3) // 4
+    )
+
+    if args.dump_frame:
+        with open(args.dump_frame, 'wb') as fp:
+            runner.dumpFrame(fp)
+
+    if args.save_state:
+        with open(args.save_state, 'wb') as fp:
+            runner.saveState(fp)
+
+    if recorder is not None:
+        with open(args.record, 'w') as fp:
+            recorder.movie.save(fp)
+
+    print('frames:        %d' % result.frames)
+    print('instructions:  %d' % result.instructions)
+    print('cycles:        %d' % result.tcycles)
+    print('seconds:       %.3f' % result.elapsed)
+    print('cycles/sec:    %.0f (%.2fx real-time)' % (
+        result.cyclesPerSecond, result.speed
+    ))
+    print('memory sha1:   %s' % runner.memoryDigest())
+    serial = runner.emulator.SERIAL.text
+    if serial:
+        print('serial:        %s' % ' '.join(serial.split()))
+    if player is not None:
+        if player.divergence is not None:
+            print('replay:        diverged at frame %d' % player.divergence)
+            return 1
+        print('replay:        %d checkpoints verified' % player.verified)
+    if runner.serialStop == TEST_FAILED:
+        print('verdict:       %s' % TEST_FAILED)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
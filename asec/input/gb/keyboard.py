@@ -1,5 +1,8 @@
+import struct
 import logging
 
+from asec.interrupt.gb import InterruptController
+
 
 class Keyboard(object):
 
@@ -16,6 +19,9 @@ class Keyboard(object):
         'SELECT': 32
     }
 
+    # buttons, directions, selected column
+    STATE = struct.Struct('<3B')
+
     def __init__(self, mainboard):
         self.mainboard = mainboard
         self.keys = None
@@ -26,6 +32,12 @@ class Keyboard(object):
         self.keys = {0: 0x0F, 1: 0x0F}
         self.colidX = 0
 
+    def saveState(self):
+        return self.STATE.pack(self.keys[0], self.keys[1], self.colidX)
+
+    def loadState(self, data):
+        self.keys[0], self.keys[1], self.colidX = self.STATE.unpack(data)
+
     def writeByte(self, value):
         self.colidX = value & 0x30
 
@@ -40,6 +52,7 @@ class Keyboard(object):
             return 0x00
 
     def press(self, keyCode):
+        keys = (self.keys[0], self.keys[1])
         if keyCode == Keyboard.KEYMAP['UP']:
             self.keys[1] &= 0xB
         elif keyCode == Keyboard.KEYMAP['DOWN']:
@@ -59,6 +72,10 @@ class Keyboard(object):
         elif keyCode == Keyboard.KEYMAP['SELECT']:
             self.keys[0] &= 0xB
 
+        # a key going down requests the joypad interrupt
+        if keys != (self.keys[0], self.keys[1]):
+            self.mainboard.INT.request(InterruptController.JOYPAD)
+
     def release(self, keyCode):
         if keyCode == Keyboard.KEYMAP['UP']:
             self.keys[1] |= 0x4
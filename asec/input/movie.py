@@ -0,0 +1,252 @@
+"""
+Input movies: key presses and releases stamped with the CPU m-cycle they
+took effect at, plus framebuffer digests at checkpoint frames.
+
+Recorded from power-on, a movie replays deterministically: keys are only
+ever applied from a scheduler event, on an instruction boundary, and the
+player schedules them for the very same m-cycles.
+
+File format, one record per line:
+    asec-movie 1
+    rom <cartridge header 0x0134-0x014F, hex>
+    P <m-cycle> <key code>      press
+    R <m-cycle> <key code>      release
+    F <frame> <sha1>            framebuffer checkpoint
+"""
+import hashlib
+import logging
+from collections import deque
+
+
+MOVIE_MAGIC = 'asec-movie'
+MOVIE_VERSION = 1
+
+PRESS = 'P'
+RELEASE = 'R'
+
+
+def frameDigest(screen):
+    """
+    SHA-1 of the last complete frame
+    @param screen Screen
+    @return str
+    """
+    return hashlib.sha1(screen.view).hexdigest()
+
+
+def cartridgeHeader(device):
+    """
+    @param device Device
+    @return str hex of the cartridge header the movie was made with
+    """
+    return bytes(device.MMU.ROM.view[0x134:0x150]).hex()
+
+
+class MovieError(Exception):
+    pass
+
+
+class Movie(object):
+    def __init__(self, rom=None):
+        """
+        @param rom str cartridge header, see cartridgeHeader()
+        """
+        self.rom = rom
+        # (m-cycle, PRESS|RELEASE, key code) in order
+        self.events = []
+        # frame -> framebuffer digest
+        self.checkpoints = {}
+
+    @property
+    def frames(self):
+        """
+        frames the movie covers, up to the last checkpoint
+        @return int
+        """
+        return max(self.checkpoints) if self.checkpoints else 0
+
+    def save(self, fp):
+        """
+        @param fp text file
+        """
+        fp.write('%s %i\n' % (MOVIE_MAGIC, MOVIE_VERSION))
+        if self.rom:
+            fp.write('rom %s\n' % self.rom)
+        for cycle, action, key in self.events:
+            fp.write('%s %i %i\n' % (action, cycle, key))
+        for frame in sorted(self.checkpoints):
+            fp.write('F %i %s\n' % (frame, self.checkpoints[frame]))
+
+    @classmethod
+    def load(cls, fp):
+        """
+        @param fp text file
+        @return Movie
+        """
+        header = fp.readline().split()
+        if len(header) != 2 or header[0] != MOVIE_MAGIC:
+            raise MovieError('Not a movie file')
+        if int(header[1]) != MOVIE_VERSION:
+            raise MovieError('Unsupported movie version %s' % header[1])
+
+        movie = cls()
+        for number, line in enumerate(fp, 2):
+            fields = line.split()
+            if not fields:
+                continue
+            try:
+                if fields[0] == 'rom':
+                    movie.rom = fields[1]
+                elif fields[0] in (PRESS, RELEASE):
+                    movie.events.append(
+                        (int(fields[1]), fields[0], int(fields[2]))
+                    )
+                elif fields[0] == 'F':
+                    movie.checkpoints[int(fields[1])] = fields[2]
+                else:
+                    raise ValueError(fields[0])
+            except (IndexError, ValueError):
+                raise MovieError('Bad record at line %i' % number)
+        movie.events.sort(key=lambda event: event[0])
+        return movie
+
+
+class MovieRecorder(object):
+    """
+    Records input into a Movie. Front-ends call press()/release() instead
+    of Keyboard.press()/release(), from any thread: keys are queued, and
+    the emulator thread applies and stamps them at its next input check,
+    every POLL_CYCLES m-cycles. The scheduler is only ever touched from
+    the emulator thread.
+    """
+    # m-cycles between input checks, 10 scanlines
+    POLL_CYCLES = 1140
+
+    def __init__(self, device, movie=None, checkpoints=60):
+        """
+        @param device Device, freshly reset
+        @param movie Movie to append to
+        @param checkpoints int frames between framebuffer digests, 0 for none
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.device = device
+        self.movie = movie or Movie(cartridgeHeader(device))
+        self.checkpoints = checkpoints
+
+        self.frame = 0
+        # (PRESS|RELEASE, key code), appended by the front-end thread,
+        # drained by the emulator thread
+        self._queue = deque()
+
+        device.scheduler.register('movie.input', self._apply)
+        device.GPU.renderScreen.connect(self._frameDone)
+
+    def detach(self):
+        """
+        to be called from the emulator thread, or with the device stopped
+        """
+        self.device.GPU.renderScreen.disconnect(self._frameDone)
+        self.device.scheduler.cancel('movie.input')
+
+    def press(self, keyCode):
+        self._queue.append((PRESS, keyCode))
+
+    def release(self, keyCode):
+        self._queue.append((RELEASE, keyCode))
+
+    def _apply(self, when):
+        now = self.device.scheduler.now
+        queue = self._queue
+        key = self.device.KEY
+        while queue:
+            action, keyCode = queue.popleft()
+            if action == PRESS:
+                key.press(keyCode)
+            else:
+                key.release(keyCode)
+            self.movie.events.append((now, action, keyCode))
+        self.device.scheduler.schedule('movie.input', when + self.POLL_CYCLES)
+
+    def _frameDone(self, screen):
+        self.frame += 1
+        scheduler = self.device.scheduler
+        if scheduler.when('movie.input') is None:
+            # armed here, on the emulator thread, and again after resets
+            scheduler.schedule('movie.input', scheduler.now)
+        if self.checkpoints and self.frame % self.checkpoints == 0:
+            self.movie.checkpoints[self.frame] = frameDigest(screen)
+
+
+class MoviePlayer(object):
+    """
+    Feeds a Movie back into a device and checks its checkpoints, the
+    device is paused at the first frame that differs
+    """
+    def __init__(self, device, movie):
+        """
+        @param device Device, freshly reset
+        @param movie Movie
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        rom = cartridgeHeader(device)
+        if movie.rom and movie.rom != rom:
+            raise MovieError('Movie is for another cartridge')
+
+        self.device = device
+        self.movie = movie
+
+        self.frame = 0
+        # first frame whose digest differs
+        self.divergence = None
+        self.verified = 0
+
+        self._next = 0
+
+        device.scheduler.register('movie.input', self._apply)
+        device.GPU.renderScreen.connect(self._frameDone)
+        self._schedule()
+
+    def detach(self):
+        self.device.GPU.renderScreen.disconnect(self._frameDone)
+        self.device.scheduler.cancel('movie.input')
+
+    @property
+    def finished(self):
+        """
+        all input was fed and the last checkpoint is reached
+        @return bool
+        """
+        return self._next >= len(self.movie.events) and \
+            self.frame >= self.movie.frames
+
+    def _schedule(self):
+        events = self.movie.events
+        if self._next < len(events):
+            self.device.scheduler.schedule('movie.input', events[self._next][0])
+
+    def _apply(self, when):
+        events = self.movie.events
+        key = self.device.KEY
+        while self._next < len(events) and events[self._next][0] <= when:
+            _, action, keyCode = events[self._next]
+            if action == PRESS:
+                key.press(keyCode)
+            else:
+                key.release(keyCode)
+            self._next += 1
+        self._schedule()
+
+    def _frameDone(self, screen):
+        self.frame += 1
+        expected = self.movie.checkpoints.get(self.frame)
+        if expected is None or self.divergence is not None:
+            return
+
+        if frameDigest(screen) == expected:
+            self.verified += 1
+        else:
+            self.divergence = self.frame
+            self.log.warning('frame %i differs from the movie', self.frame)
+            self.device.pause()
@@ -0,0 +1,128 @@
+import struct
+import logging
+
+
+class InterruptController(object):
+    """
+    Owns IE (0xFFFF), IF (0xFF0F) and the master enable IME.
+
+    `pending` (an interrupt is to be serviced, or the instruction after
+    EI is due) and `requested` (one is requested and enabled, which ends
+    HALT even with IME off) are kept precomputed and only updated when
+    IE, IF, IME or the EI delay change, so the execution loop tests a
+    single attribute per instruction.
+    """
+    # IE/IF bits, in priority order
+    VBLANK = 0x01
+    LCDSTAT = 0x02
+    TIMER = 0x04
+    SERIAL = 0x08
+    JOYPAD = 0x10
+
+    # Handler address per bit
+    VECTORS = (0x40, 0x48, 0x50, 0x58, 0x60)
+
+    # IE, IF, IME, EI delay
+    STATE = struct.Struct('<4B')
+
+    def __init__(self):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._ie = 0
+        self._if = 0
+        self._ime = 0
+
+        self.requested = 0
+        self.pending = False
+        # EI was executed, IME takes effect after the next instruction
+        self.delay = False
+
+        self.reset()
+
+    def reset(self):
+        self._ie = 0
+        self._if = 0
+        self._ime = 0
+        self.delay = False
+        self._update()
+
+    def _update(self):
+        self.requested = self._ie & self._if & 0x1F
+        self.pending = bool(self.delay or (self._ime and self.requested))
+
+    @property
+    def IE(self):
+        return self._ie
+
+    @IE.setter
+    def IE(self, value):
+        self._ie = value & 0xFF
+        self._update()
+
+    @property
+    def IF(self):
+        return self._if | 0xE0
+
+    @IF.setter
+    def IF(self, value):
+        self._if = value & 0x1F
+        self._update()
+
+    @property
+    def ime(self):
+        return self._ime
+
+    @ime.setter
+    def ime(self, value):
+        self._ime = 1 if value else 0
+        self.delay = False
+        self._update()
+
+    def enable(self):
+        """
+        EI, the next instruction runs before any interrupt is taken,
+        whenever the interrupt becomes pending
+        """
+        self._ime = 1
+        self.delay = True
+        self._update()
+
+    def endDelay(self):
+        """
+        the instruction after EI is about to run, interrupts are taken
+        after it
+        """
+        self.delay = False
+        self._update()
+
+    def request(self, mask):
+        """
+        sets IF bits
+        @param mask int
+        """
+        self._if |= mask
+        self._update()
+
+    def acknowledge(self):
+        """
+        takes the highest priority pending interrupt: clears its IF bit
+        and IME
+        @return int handler address
+        """
+        requested = self.requested
+        bit = 0
+        while not requested & (1 << bit):
+            bit += 1
+        self._if &= ~(1 << bit)
+        self.ime = 0
+        return self.VECTORS[bit]
+
+    def saveState(self):
+        return self.STATE.pack(
+            self._ie, self._if, self._ime, 1 if self.delay else 0
+        )
+
+    def loadState(self, data):
+        self._ie, self._if, self._ime, delay = self.STATE.unpack(data)
+        self.delay = bool(delay)
+        self._update()
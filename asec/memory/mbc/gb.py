@@ -0,0 +1,384 @@
+import struct
+import logging
+
+
+# External RAM size per header byte 0x149
+RAM_SIZES = {
+    0x00: 0, 0x01: 0x800, 0x02: 0x2000, 0x03: 0x8000,
+    0x04: 0x20000, 0x05: 0x10000
+}
+
+# Cartridge types with battery-backed RAM, header byte 0x147
+BATTERY_TYPES = frozenset((
+    0x03, 0x06, 0x09, 0x0D, 0x0F, 0x10, 0x13, 0x1B, 0x1E, 0x22, 0xFF
+))
+
+
+class MBC(object):
+    """
+    Memory bank controller of a cartridge without one: 32K of ROM and
+    an optional 8K of external RAM, both mapped for good.
+
+    Controllers keep their registers and map banks through the MMU:
+    mapROMBank0() for 0x0000-0x3FFF, mapROMBank() for 0x4000-0x7FFF and
+    mapERAMBank() for 0xA000-0xBFFF. Those swap in precomputed page
+    views, so a bank switch costs a few slice assignments and accesses
+    stay a page lookup. Where no RAM bank is mapped, accesses go to
+    readRAM()/writeRAM().
+    """
+    # registers saved in states, all ints
+    FIELDS = ()
+
+    # built-in RAM size, None when the header tells it
+    RAM_SIZE = None
+
+    def __init__(self, mmu, cartType=0):
+        """
+        @param mmu MMU
+        @param cartType int header byte 0x147
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.mmu = mmu
+        self.cartType = cartType
+        self.STATE = struct.Struct('<%iq' % len(self.FIELDS))
+
+        self.reset()
+
+    def reset(self):
+        pass
+
+    @property
+    def battery(self):
+        """
+        the cartridge RAM is battery-backed
+        @return bool
+        """
+        return self.cartType in BATTERY_TYPES
+
+    def ramSize(self):
+        """
+        @return int bytes of external RAM on the cartridge
+        """
+        if self.RAM_SIZE is not None:
+            return self.RAM_SIZE
+        return RAM_SIZES.get(self.mmu.ROM.readByte(0x149), 0)
+
+    def map(self):
+        """
+        maps the banks selected by the registers
+        """
+        self.mmu.mapROMBank0(0)
+        self.mmu.mapROMBank(1)
+        self.mmu.mapERAMBank(0)
+
+    def writeRegister(self, address, value):
+        """
+        write to 0x0000-0x7FFF
+        @param address int
+        @param value int
+        """
+        pass
+
+    def readRAM(self, address):
+        """
+        read from 0xA000-0xBFFF while no RAM bank is mapped
+        @param address int
+        @return int
+        """
+        return 0xFF
+
+    def writeRAM(self, address, value):
+        """
+        write to 0xA000-0xBFFF while no RAM bank is mapped
+        @param address int
+        @param value int
+        """
+        pass
+
+    def saveState(self):
+        return self.STATE.pack(*[getattr(self, name) for name in self.FIELDS])
+
+    def loadState(self, data):
+        for name, value in zip(self.FIELDS, self.STATE.unpack(data)):
+            setattr(self, name, value)
+        self.map()
+
+
+class MBC1(MBC):
+    """
+    Up to 2M ROM, 32K RAM. The 2-bit register at 0x4000 holds either the
+    upper ROM bank bits or, in mode 1, the RAM bank; mode 1 also maps
+    the upper bits at 0x0000.
+    """
+    FIELDS = ('bankLow', 'bankHigh', 'ramOn', 'mode')
+
+    def reset(self):
+        self.bankLow = 1
+        self.bankHigh = 0
+        self.ramOn = 0
+        self.mode = 0
+
+    def map(self):
+        self._mapROM()
+        self._mapRAM()
+
+    def _mapROM(self):
+        self.mmu.mapROMBank0(self.bankHigh << 5 if self.mode else 0)
+        self.mmu.mapROMBank((self.bankHigh << 5) | self.bankLow)
+
+    def _mapRAM(self):
+        if not self.ramOn:
+            self.mmu.mapERAMBank(None)
+        else:
+            self.mmu.mapERAMBank(self.bankHigh if self.mode else 0)
+
+    def writeRegister(self, address, value):
+        if address < 0x2000:
+            self.ramOn = 1 if (value & 0x0F) == 0x0A else 0
+            self._mapRAM()
+        elif address < 0x4000:
+            self.bankLow = (value & 0x1F) or 1
+            self.mmu.mapROMBank((self.bankHigh << 5) | self.bankLow)
+        elif address < 0x6000:
+            self.bankHigh = value & 3
+            self.map()
+        else:
+            self.mode = value & 1
+            self.map()
+
+
+class MBC2(MBC):
+    """
+    Up to 256K ROM and 512 4-bit cells of built-in RAM, repeated over
+    0xA000-0xBFFF. Address bit 8 tells the RAM enable and the ROM bank
+    registers apart.
+    """
+    FIELDS = ('romBank', 'ramOn')
+
+    RAM_SIZE = 0x200
+
+    def reset(self):
+        self.romBank = 1
+        self.ramOn = 0
+
+    def map(self):
+        self.mmu.mapROMBank0(0)
+        self.mmu.mapROMBank(self.romBank)
+        # 4-bit cells, always through readRAM/writeRAM
+        self.mmu.mapERAMBank(None)
+
+    def writeRegister(self, address, value):
+        if address >= 0x4000:
+            return
+        if address & 0x100:
+            self.romBank = (value & 0x0F) or 1
+            self.mmu.mapROMBank(self.romBank)
+        else:
+            self.ramOn = 1 if (value & 0x0F) == 0x0A else 0
+
+    def readRAM(self, address):
+        if not self.ramOn:
+            return 0xFF
+        return 0xF0 | self.mmu.ERAM.buffer[address & 0x1FF]
+
+    def writeRAM(self, address, value):
+        if self.ramOn:
+            self.mmu.ERAM.buffer[address & 0x1FF] = value & 0x0F
+            self.mmu.markERAMDirty(address & 0x1FF)
+
+
+class MBC3(MBC):
+    """
+    Up to 2M ROM, 32K RAM and a real time clock. Selecting 0x08-0x0C
+    instead of a RAM bank maps the clock registers (seconds, minutes,
+    hours, day low, day high), which read as latched by writing 0 then 1
+    to 0x6000.
+
+    The clock runs on emulated time, so runs stay deterministic: it holds
+    `rtcSeconds` as of m-cycle `rtcBase`.
+    """
+    FIELDS = (
+        'romBank', 'ramBank', 'ramOn', 'latch',
+        'rtcSeconds', 'rtcBase', 'rtcHalt', 'rtcCarry',
+        'latchedS', 'latchedM', 'latchedH', 'latchedDL', 'latchedDH'
+    )
+
+    # m-cycles per second
+    SECOND = 1048576
+
+    def reset(self):
+        self.romBank = 1
+        self.ramBank = 0
+        self.ramOn = 0
+        self.latch = 0xFF
+
+        self.rtcSeconds = 0
+        self.rtcBase = self._now()
+        self.rtcHalt = 0
+        self.rtcCarry = 0
+        self.latchedS = self.latchedM = self.latchedH = 0
+        self.latchedDL = self.latchedDH = 0
+
+    def _now(self):
+        return self.mmu._mainboard.scheduler.now
+
+    def map(self):
+        self.mmu.mapROMBank0(0)
+        self.mmu.mapROMBank(self.romBank)
+        self._mapRAM()
+
+    def _mapRAM(self):
+        if not self.ramOn or self.ramBank > 3:
+            self.mmu.mapERAMBank(None)
+        else:
+            self.mmu.mapERAMBank(self.ramBank)
+
+    def writeRegister(self, address, value):
+        if address < 0x2000:
+            self.ramOn = 1 if (value & 0x0F) == 0x0A else 0
+            self._mapRAM()
+        elif address < 0x4000:
+            self.romBank = (value & 0x7F) or 1
+            self.mmu.mapROMBank(self.romBank)
+        elif address < 0x6000:
+            self.ramBank = value & 0x0F
+            self._mapRAM()
+        else:
+            if self.latch == 0 and value == 1:
+                self._latch()
+            self.latch = value
+
+    ###
+    # Real time clock
+    ###
+    def _seconds(self):
+        if self.rtcHalt:
+            return self.rtcSeconds
+        return self.rtcSeconds + (self._now() - self.rtcBase) // self.SECOND
+
+    def _setSeconds(self, seconds):
+        self.rtcSeconds = seconds
+        self.rtcBase = self._now()
+
+    def _latch(self):
+        seconds = self._seconds()
+        days = seconds // 86400
+        if days > 511:
+            self.rtcCarry = 1
+            days &= 511
+            self._setSeconds(days * 86400 + seconds % 86400)
+        self.latchedS = seconds % 60
+        self.latchedM = (seconds // 60) % 60
+        self.latchedH = (seconds // 3600) % 24
+        self.latchedDL = days & 0xFF
+        self.latchedDH = (days >> 8) | (self.rtcHalt << 6) | \
+            (self.rtcCarry << 7)
+
+    def readRAM(self, address):
+        if not self.ramOn:
+            return 0xFF
+        register = self.ramBank
+        if register == 0x08:
+            return self.latchedS
+        elif register == 0x09:
+            return self.latchedM
+        elif register == 0x0A:
+            return self.latchedH
+        elif register == 0x0B:
+            return self.latchedDL
+        elif register == 0x0C:
+            return self.latchedDH
+        return 0xFF
+
+    def writeRAM(self, address, value):
+        if not self.ramOn:
+            return
+        register = self.ramBank
+        seconds = self._seconds()
+        s = seconds % 60
+        m = (seconds // 60) % 60
+        h = (seconds // 3600) % 24
+        days = seconds // 86400
+
+        if register == 0x08:
+            s = value % 60
+        elif register == 0x09:
+            m = value % 60
+        elif register == 0x0A:
+            h = value % 24
+        elif register == 0x0B:
+            days = (days & 0x100) | value
+        elif register == 0x0C:
+            days = (days & 0xFF) | ((value & 1) << 8)
+            self.rtcCarry = (value >> 7) & 1
+            halt = (value >> 6) & 1
+            if halt != self.rtcHalt:
+                # freeze, or restart from, the current count
+                self.rtcHalt = halt
+        else:
+            return
+        self._setSeconds(((days * 24 + h) * 60 + m) * 60 + s)
+
+
+class MBC5(MBC):
+    """
+    Up to 8M ROM with a 9-bit bank number, where bank 0 can be mapped at
+    0x4000 too, and 128K RAM. Rumble cartridges use RAM bank bit 3 for
+    the motor.
+    """
+    FIELDS = ('romBank', 'ramBank', 'ramOn')
+
+    RUMBLE = (0x1C, 0x1D, 0x1E)
+
+    def reset(self):
+        self.romBank = 1
+        self.ramBank = 0
+        self.ramOn = 0
+
+    def map(self):
+        self.mmu.mapROMBank0(0)
+        self.mmu.mapROMBank(self.romBank)
+        self._mapRAM()
+
+    def _mapRAM(self):
+        self.mmu.mapERAMBank(self.ramBank if self.ramOn else None)
+
+    def writeRegister(self, address, value):
+        if address < 0x2000:
+            self.ramOn = 1 if (value & 0x0F) == 0x0A else 0
+            self._mapRAM()
+        elif address < 0x3000:
+            self.romBank = (self.romBank & 0x100) | value
+            self.mmu.mapROMBank(self.romBank)
+        elif address < 0x4000:
+            self.romBank = (self.romBank & 0xFF) | ((value & 1) << 8)
+            self.mmu.mapROMBank(self.romBank)
+        elif address < 0x6000:
+            self.ramBank = value & (0x07 if self.cartType in self.RUMBLE else 0x0F)
+            self._mapRAM()
+
+
+# Controller per cartridge type, header byte 0x147
+MBC_TYPES = {
+    0x00: MBC, 0x08: MBC, 0x09: MBC,
+    0x01: MBC1, 0x02: MBC1, 0x03: MBC1,
+    0x05: MBC2, 0x06: MBC2,
+    0x0F: MBC3, 0x10: MBC3, 0x11: MBC3, 0x12: MBC3, 0x13: MBC3,
+    0x19: MBC5, 0x1A: MBC5, 0x1B: MBC5, 0x1C: MBC5, 0x1D: MBC5, 0x1E: MBC5,
+}
+
+
+def createMBC(mmu, cartType):
+    """
+    @param mmu MMU
+    @param cartType int header byte 0x147
+    @return MBC
+    """
+    cls = MBC_TYPES.get(cartType)
+    if cls is None:
+        logging.getLogger('MBC').warning(
+            'Unsupported cartridge type 0x%02X, banking disabled', cartType
+        )
+        cls = MBC
+    return cls(mmu, cartType)
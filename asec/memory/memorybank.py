@@ -1,51 +1,74 @@
-import os
-import array
 import logging
 
-from asec.utils.hexdump import hexdump
-
 
 class OutOfRangeException(Exception):
     pass
 
 
 class MemoryBank(object):
-    def __init__(self, size=0):
+    """
+    Fixed-size memory backed by a flat bytearray.
+
+    readByte/writeByte are plain O(1) indexed accesses without any
+    checking or logging. Pass checked=True to get the bounds-checked,
+    logging variant for debugging.
+    """
+    def __init__(self, size=0, checked=False):
         self.log = logging.getLogger(self.__class__.__name__)
 
         self._size = int(size)
-        self._buffer = None
+        self._buffer = bytearray(self._size)
+        self._view = memoryview(self._buffer)
+
+        self._checked = checked
+        if checked:
+            self.readByte = self._checkedReadByte
+            self.writeByte = self._checkedWriteByte
+            self.readWord = self._checkedReadWord
+            self.writeWord = self._checkedWriteWord
 
         self.reset()
 
     def reset(self, fill=True):
         """
         reset memory
+        @param fill bool clear the contents
         """
-        def initializer():
-            for i in range(self.size):
-                yield 0x00
+        if fill:
+            self._buffer[:] = bytes(self._size)
 
-        del self._buffer
-        self._buffer = array.array('B', initializer())
+    def load(self, f):
+        """
+        fills memory from a file object, the rest is zeroed
+        @param f file
+        @return int bytes read
+        """
+        loaded = 0
+        while loaded < self._size:
+            n = f.readinto(self._view[loaded:])
+            if not n:
+                break
+            loaded += n
 
-        # self._buffer = dict(((i, 0) for i in range(self.size)))
+        self._view[loaded:] = bytes(self._size - loaded)
 
-    def load(self, f):
-        f.seek(0, os.SEEK_END)
-        size = f.tell()
+        if loaded == self._size and f.read(1):
+            self.log.warning('data truncated to 0x%06X bytes', self._size)
 
-        f.seek(0)
-        self.reset(fill=False)
-        self._buffer.fromfile(f, size)
-        while self._buffer.buffer_info()[1] < self.size:
-            self._buffer.append(0x00)
+        return loaded
 
     def dump(self, fp):
-        return fp.write(self.dumps())
+        return fp.write(self._view)
 
     def dumps(self):
-        return self._buffer.tostring()
+        return bytes(self._buffer)
+
+    def loads(self, data):
+        """
+        restores contents saved with dumps()
+        @param data bytes exactly `size` long
+        """
+        self._view[:] = data
 
     def __len__(self):
         return self._size
@@ -58,16 +81,34 @@ class MemoryBank(object):
         """
         return self._size
 
+    @property
+    def checked(self):
+        return self._checked
+
+    @property
+    def buffer(self):
+        """
+        underlying bytearray
+        @return bytearray
+        """
+        return self._buffer
+
+    @property
+    def view(self):
+        """
+        zero-copy view of the whole memory
+        @return memoryview
+        """
+        return self._view
+
     def writeWord(self, address, value):
         """
         write 16 bit word
         @param address int
         @param value int
         """
-        self.log.debug('writeWord 0x%06X at 0x%06X', value, address)
-
-        self.writeByte(address, value & 0xFF)
-        self.writeByte(address + 1, (value & 0xFF) >> 8)
+        self._buffer[address] = value & 0xFF
+        self._buffer[address + 1] = (value >> 8) & 0xFF
 
     def readWord(self, address):
         """
@@ -75,8 +116,7 @@ class MemoryBank(object):
         @param address int
         @return int
         """
-        self.log.debug('readWord at 0x%06X', address)
-        return self.readByte(address) + (self.readByte(address + 1) << 8)
+        return self._buffer[address] | (self._buffer[address + 1] << 8)
 
     def writeByte(self, address, value):
         """
@@ -84,22 +124,7 @@ class MemoryBank(object):
         @param address int
         @param value int
         """
-        self.log.debug('writeByte 0x%06X at 0x%06X', value, address)
-
-        if (address < 0) or (address >= self.size):
-            raise OutOfRangeException(
-                'Out of range 0x%06X, (size 0x%06X)' %
-                (address, self.size)
-            )
-
-        try:
-            self._buffer.insert(address, value & 0xFF)
-        except Exception as e:
-            self.log.error('can not write byte to 0x%06X', address)
-            print(hexdump(self.dumps()))
-            raise e
-            # print(address, value)
-        # self._buffer[address] = value
+        self._buffer[address] = value & 0xFF
 
     def readByte(self, address):
         """
@@ -107,26 +132,45 @@ class MemoryBank(object):
         @param address int
         @return int
         """
-        self.log.debug('readByte at 0x%06X', address)
-
-        if (address < 0) or (address >= self.size):
+        return self._buffer[address]
+
+    ###
+    # Checked variants, enabled with checked=True
+    ###
+    def _checkRange(self, address):
+        if (address < 0) or (address >= self._size):
+            self.log.error('out of range access at 0x%06X', address)
             raise OutOfRangeException(
                 'Out of range 0x%06X, (size 0x%06X)' %
-                (address, self.size)
+                (address, self._size)
             )
 
-        try:
-            return self._buffer[address]
-        except Exception as e:
-            self.log.error('can not read byte at 0x%06X', address)
-            print(hexdump(self.dumps()))
-            raise e
+    def _checkedWriteWord(self, address, value):
+        self.log.debug('writeWord 0x%06X at 0x%06X', value, address)
+        self.writeByte(address, value & 0xFF)
+        self.writeByte(address + 1, (value >> 8) & 0xFF)
 
-    def __getitem__(self, item):
-        return self.readByte(item)
+    def _checkedReadWord(self, address):
+        self.log.debug('readWord at 0x%06X', address)
+        return self.readByte(address) | (self.readByte(address + 1) << 8)
 
-    def __getattr__(self, item):
+    def _checkedWriteByte(self, address, value):
+        self.log.debug('writeByte 0x%06X at 0x%06X', value, address)
+        self._checkRange(address)
+        self._buffer[address] = value & 0xFF
+
+    def _checkedReadByte(self, address):
+        self.log.debug('readByte at 0x%06X', address)
+        self._checkRange(address)
+        return self._buffer[address]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self._view[item]
         return self.readByte(item)
 
     def __setitem__(self, key, value):
-        self.writeByte(key, value)
+        if isinstance(key, slice):
+            self._view[key] = value
+        else:
+            self.writeByte(key, value)
@@ -1,9 +1,12 @@
 import os
+import struct
 import logging
 
-from asec.memory.ram import RAM
+from asec.memory.ram import RAM, BatteryRAM
 from asec.memory.rom import ROM
+from asec.memory.rom.gb import Cartridge
 from asec.bios.gb import BIOS
+from asec.memory.mbc.gb import createMBC
 
 
 class MMU:
@@ -88,169 +91,372 @@ class MMU:
     ZERO_PAGE_RAM_OFFSET = 0xFF80
     ZERO_PAGE_RAM_END = 0xFFFF
 
+    # Address decoding is done through 256-entry page tables, one entry per
+    # 256 bytes of address space. An entry is either a 256-byte memoryview
+    # into the backing bank, so that an access is one lookup plus one index,
+    # or None, which sends the access to the I/O handlers.
+    PAGE_COUNT = 0x100
+
+    # Code bank ids, per page, used to key translated CPU blocks: ROM banks
+    # are numbered by their offset, other memories get the ids below.
+    # Pages without an id (OAM, I/O, zero page) are never translated.
+    BANK_BIOS = 0x1000
+    BANK_VRAM = 0x1001
+    BANK_WRAM = 0x1002
+    BANK_ERAM = 0x1100
+
+    # I/O registers changing between scheduled events: DIV, TIMA
+    VOLATILE = frozenset((0xFF04, 0xFF05))
+
+    # BIOS mapped, memory bank controller state size
+    STATE = struct.Struct('<BI')
+
+    # Use bounds-checked, logging memory banks
+    CHECKED = False
+
     def __init__(self, mainboard):
         self._mainboard = mainboard
 
         self.log = logging.getLogger(self.__class__.__name__)
 
-        self.BIOS = BIOS()
-        self.ROM = ROM(0x100000)
+        self.BIOS = BIOS(checked=self.CHECKED)
+        # empty until a cartridge is loaded
+        self._rom = ROM(0x8000, checked=self.CHECKED)
+
+        self._eram = RAM(0x8000, checked=self.CHECKED)
+        self.WRAM = RAM(0x2000, checked=self.CHECKED)
+        self.ZRAM = RAM(0x80, checked=self.CHECKED)
 
-        self.ERAM = RAM(0x8000)
-        self.WRAM = RAM(0x2000)
-        self.ZRAM = RAM(0x80)
+        self.inBios = 1
 
-        self.cartType = 0
+        self._readPages = [None] * self.PAGE_COUNT
+        self._writePages = [None] * self.PAGE_COUNT
+        self._codePages = [None] * self.PAGE_COUNT
 
-        self.romBank = 0
-        self.ramBank = 0
-        self.ramOn = 0
-        self.mode = 0
+        # per bank page views, built on first use
+        self._romBanks = {}
+        self._eramBanks = {}
 
-        self.romOffs = 0x4000
-        self.ramOffs = 0
+        # ERAM offset of each page mapped at 0xA000-0xBFFF
+        self._eramOffsets = None
+        # ERAM is a save file, clean pages are mapped read-only
+        self._battery = False
 
-        self.inBios = 1
-        self.IE = 0
-        self.IF = 0  # Interrupt flags
+        self.mbc = createMBC(self, 0)
 
         self.reset()
 
     def reset(self):
         self.inBios = 1
-        self.IE = 0
-        self.IF = 0
-        self.cartType = 0
-        self.romBank = 0
-        self.ramBank = 0
-        self.ramOn = 0
-        self.mode = 0
-        self.romOffs = 0x4000
-        self.ramOffs = 0x00
+        self.mbc.reset()
 
         self.BIOS.reset()
         self.ROM.reset(fill=False)
         self.ERAM.reset()
         self.WRAM.reset()
         self.ZRAM.reset()
+
+        self.mapMemory()
         self.log.debug('reset')
 
+    @property
+    def ROM(self):
+        return self._rom
+
+    @ROM.setter
+    def ROM(self, rom):
+        self._rom = rom
+        self._romBanks.clear()
+        self.mbc.map()
+
+    @property
+    def ERAM(self):
+        return self._eram
+
+    @ERAM.setter
+    def ERAM(self, eram):
+        self._eram = eram
+        self._battery = isinstance(eram, BatteryRAM)
+        self._eramBanks.clear()
+        self.mbc.map()
+
+    @property
+    def cartType(self):
+        """
+        cartridge type, header byte 0x147, selects the bank controller
+        @return int
+        """
+        return self.mbc.cartType
+
+    @cartType.setter
+    def cartType(self, cartType):
+        self.closeERAM()
+        self.mbc = createMBC(self, cartType)
+        # as much RAM as the cartridge has, none reads 0xFF, and banks
+        # past it wrap around instead of reaching spare memory
+        self.ERAM = RAM(self.mbc.ramSize(), checked=self.CHECKED)
+
+    def saveState(self):
+        """
+        @return bytes registers, work, zero page and external RAM
+        """
+        mbc = self.mbc.saveState()
+        return b''.join((
+            self.STATE.pack(self.inBios, len(mbc)),
+            mbc,
+            self.WRAM.dumps(),
+            self.ZRAM.dumps(),
+            self.ERAM.dumps()
+        ))
+
+    def loadState(self, data):
+        """
+        @param data bytes from saveState(), the cartridge must be loaded
+        """
+        self.inBios, size = self.STATE.unpack_from(data)
+        offset = self.STATE.size
+        mbc = data[offset:offset + size]
+        offset += size
+        for bank in (self.WRAM, self.ZRAM, self.ERAM):
+            bank.loads(data[offset:offset + bank.size])
+            offset += bank.size
+        self.mapMemory()
+        # maps the banks the registers select
+        self.mbc.loadState(mbc)
+
+    ###
+    # Page tables
+    ###
+    @staticmethod
+    def _mapPages(pages, first, view, count):
+        for i in range(count):
+            pages[first + i] = view[i << 8:(i + 1) << 8]
+
+    def mapMemory(self):
+        """
+        rebuilds the whole page tables
+        """
+        reads = self._readPages
+        writes = self._writePages
+        code = self._codePages
+
+        for i in range(self.PAGE_COUNT):
+            reads[i] = writes[i] = code[i] = None
+
+        self.mbc.map()
+
+        # VRAM, tile data writes (0x8000-0x97FF) go through the GPU
+        # to keep its decoded tiles current
+        vram = self._mainboard.GPU.VRAM.view
+        self._mapPages(reads, 0x80, vram, 0x20)
+        self._mapPages(writes, 0x98, vram[0x1800:], 0x08)
+        code[0x80:0xA0] = [self.BANK_VRAM] * 0x20
+
+        # Work RAM and its echo up to 0xFDFF
+        wram = self.WRAM.view
+        self._mapPages(reads, 0xC0, wram, 0x20)
+        self._mapPages(writes, 0xC0, wram, 0x20)
+        self._mapPages(reads, 0xE0, wram, 0x1E)
+        self._mapPages(writes, 0xE0, wram, 0x1E)
+        code[0xC0:0xFE] = [self.BANK_WRAM] * 0x3E
+
+        # 0xFE00-0xFFFF: OAM, I/O, zero page and IE go through handlers
+
+    def _romBank(self, bank):
+        """
+        @param bank int
+        @return tuple (page views, code ids) of the 16K ROM bank,
+                 the bank number wraps around the bank count
+        """
+        bank %= self._rom.banks
+        cached = self._romBanks.get(bank)
+        if cached is None:
+            view = self._rom.bank(bank)
+            cached = self._romBanks[bank] = (
+                [view[i << 8:(i + 1) << 8] for i in range(0x40)],
+                [bank] * 0x40
+            )
+        return cached
+
+    def mapROMBank0(self, bank):
+        """
+        maps a ROM bank at 0x0000-0x3FFF, under the BIOS while it is mapped
+        @param bank int
+        """
+        pages, code = self._romBank(bank)
+        self._readPages[0x00:0x40] = pages
+        self._codePages[0x00:0x40] = code
+        if self.inBios:
+            self._readPages[0x00] = self.BIOS.view[0x00:0x100]
+            self._codePages[0x00] = self.BANK_BIOS
+
+    def mapROMBank(self, bank):
+        """
+        maps a ROM bank at 0x4000-0x7FFF
+        @param bank int
+        """
+        pages, code = self._romBank(bank)
+        self._readPages[0x40:0x80] = pages
+        self._codePages[0x40:0x80] = code
+
+    def mapERAMBank(self, bank):
+        """
+        maps an 8K external RAM bank at 0xA000-0xBFFF
+        @param bank int|None None sends accesses to the bank controller,
+                             for disabled RAM and special registers
+        """
+        size = self._eram.size
+        if bank is None or not size:
+            self._readPages[0xA0:0xC0] = [None] * 0x20
+            self._writePages[0xA0:0xC0] = [None] * 0x20
+            self._codePages[0xA0:0xC0] = [None] * 0x20
+            self._eramOffsets = None
+            return
+
+        bank %= max(1, size >> 13)
+        cached = self._eramBanks.get(bank)
+        if cached is None:
+            # RAM smaller than a bank repeats over it
+            offsets = [((bank << 13) + (i << 8)) % size for i in range(0x20)]
+            view = self._eram.view
+            cached = self._eramBanks[bank] = (
+                [view[offset:offset + 0x100] for offset in offsets],
+                [self.BANK_ERAM + bank] * 0x20,
+                offsets
+            )
+        pages, code, self._eramOffsets = cached
+        self._readPages[0xA0:0xC0] = pages
+        self._codePages[0xA0:0xC0] = code
+        if self._battery:
+            # the first write to each page marks it dirty
+            self._writePages[0xA0:0xC0] = [None] * 0x20
+        else:
+            self._writePages[0xA0:0xC0] = pages
+
+    ###
+    # Battery-backed RAM
+    ###
+    @staticmethod
+    def batteryPath(romFileName):
+        """
+        @param romFileName str
+        @return str save file next to the ROM
+        """
+        return os.path.splitext(romFileName)[0] + '.sav'
+
+    def loadBattery(self, path):
+        """
+        maps the external RAM from a save file, if the cartridge keeps it
+        on a battery, the cartridge must be loaded
+        @param path str
+        @return bool
+        """
+        size = self.mbc.ramSize()
+        if not self.mbc.battery or not size:
+            return False
+        self.closeERAM()
+        self.ERAM = BatteryRAM(path, size, checked=self.CHECKED)
+        return True
+
+    def markERAMDirty(self, offset):
+        """
+        @param offset int ERAM byte written outside the page tables
+        """
+        if self._battery:
+            self._eram.markDirty(offset)
+
+    def flushERAM(self):
+        """
+        writes battery-backed RAM changed since the last call to its save
+        file, and maps the pages read-only again to catch the next writes
+        @return int granules written
+        """
+        if not self._battery or not self._eram.dirty:
+            return 0
+        count = self._eram.flush()
+        if self._eramOffsets is not None:
+            self._writePages[0xA0:0xC0] = [None] * 0x20
+        return count
+
+    def closeERAM(self):
+        """
+        flushes and closes the save file, the contents stay mapped from
+        memory
+        """
+        if not self._battery:
+            return
+        eram = self._eram
+        copy = RAM(eram.size, checked=self.CHECKED)
+        copy.loads(eram.view)
+        # drops the views into the file mapping
+        self.ERAM = copy
+        eram.close()
+
+    def unmapBIOS(self):
+        if self.inBios:
+            self.inBios = 0
+            self.mbc.map()
+            self.log.debug('BIOS unmapped')
+
+    def codeBank(self, address):
+        """
+        id of the bank mapped at address, for caching translated code
+        @param address int
+        @return int|None None where code can not be translated
+        """
+        return self._codePages[address >> 8]
+
+    ###
+    # Access
+    ###
     def readByte(self, address):
         """
         reads byte
         @param address int
         @return int
         """
-        value = self._readByte(address)
-        self.log.debug("[0x%06X] >> 0x%06X", address, value)
-        return value
+        page = self._readPages[address >> 8]
+        if page is not None:
+            return page[address & 0xFF]
+        return self._readIO(address)
 
-    def _readByte(self, address):
-        adr = address & 0xF000
+    def _readIO(self, address):
+        # External RAM, disabled or banked out
+        if address < 0xC000:
+            return self.mbc.readRAM(address)
 
-        self.log.debug(
-            'Reading byte from 0x%04X & 0xF000 = 0x%04X',
-            address,
-            adr
-        )
+        # OAM
+        if address < 0xFF00:
+            address &= 0xFF
+            return self._mainboard.GPU.ORAM.readByte(address) \
+                if address < 0xA0 else 0
 
-        # ROM Bank 0
-        if adr == 0x0000:
-            if self.inBios:
-                self.log.debug('In section: BIOS')
-                if address < 0x0100:
-                    return self.BIOS.readByte(address)
-                elif self._mainboard.CPU.R.pc == 0x0100:
-                    self.log.debug('In section: BIOS (leaving)')
-                    self.inBios = False
-                    return 0x0
-            else:
-                self.log.debug('In section: ROM')
-                return self.ROM.readByte(address)
+        # Interrupt enable
+        if address == 0xFFFF:
+            return self._mainboard.INT.IE
 
-        elif 0x1000 <= adr <= 0x3000:
-            self.log.debug('In section: ROM')
-            return self.ROM.readByte(address)
+        # Zeropage RAM
+        if address > 0xFF7F:
+            return self.ZRAM.readByte(address & 0x7F)
 
-        # ROM Bank 1
-        elif 0x4000 <= adr <= 0x7000:
-            self.log.debug('In section: ROM Bank 1')
-            return self.ROM.readByte(self.romOffs + (address & 0x3FFF))
+        # I/O
+        address &= 0xFF
+        if address == 0x00:
+            return self._mainboard.KEY.readByte()
 
-        # VRAM
-        elif 0x8000 <= adr <= 0x9000:
-            self.log.debug('In section: VRAM')
-            return self._mainboard.GPU.VRAM.readByte(address & 0x1FFF)
+        elif address == 0x01 or address == 0x02:
+            return self._mainboard.SERIAL.readByte(0xFF00 | address)
 
-        # External RAM
-        elif 0xA000 <= adr <= 0xB000:
-            self.log.debug('In section: External RAM')
-            return self.ERAM.readByte(self.ramOffs + (address & 0x1FFF))
+        elif 0x04 <= address <= 0x07:
+            return self._mainboard.TIMER.readByte(0xFF00 | address)
 
-        # Work RAM and echo
-        elif 0xC000 <= adr <= 0xE000:
-            self.log.debug('In section: Work RAM & echo')
-            return self.WRAM.readByte(address & 0x1FFF)
+        elif address == 0x0F:
+            return self._mainboard.INT.IF
 
-        else:
-            adr = address & 0x0F00
-            self.log.debug('in section 0xF000 with adr=0x%04X', adr)
-            # Echo RAM
-            if 0x000 <= adr <= 0xD00:
-                self.log.debug('In section: Echo RAM')
-                return self.WRAM.readByte(address & 0x1FFF)
-
-            # OAM
-            elif adr == 0xE00:
-                self.log.debug('In section: OAM')
-                return self._mainboard.GPU.ORAM.readByte(address & 0xFF) \
-                    if (address & 0xFF) < 0xA0 else 0
-
-            # Zeropage RAM, I/O, interrupts
-            else:
-                self.log.debug('In section: Zeropage RAM, I/O, interrupts')
-                if address == 0xFFFF:
-                    self.log.debug('In section: 0xFFFF, IE')
-                    return self.IE
-
-                elif address > 0xFF7F:
-                    self.log.debug('In section: Zeropage RAM')
-                    return self.ZRAM.readByte(address & 0x7F)
-
-                else:
-                    adr = address & 0xF0
-                    if adr == 0x00:
-                        adr = address & 0xF
-
-                        if adr == 0:
-                            self.log.debug('In section: Keyboard')
-                            return self._mainboard.KEY.readByte()
-
-                        elif 4 <= adr <= 7:
-                            self.log.debug('In section: Timer')
-                            return self._mainboard.TIMER.readByte(address)
-
-                        elif adr == 15:
-                            self.log.debug('In section: Interrupt')
-                            return self.IF  # interrupt flags
-
-                        else:
-                            self.log.debug('In section: 0')
-                            return 0
-
-                    elif 0x10 <= adr <= 0x30:
-                        self.log.debug('In section: 0')
-                        return 0
-
-                    elif 0x40 <= adr <= 0x70:
-                        self.log.debug('In section: GPU')
-                        return self._mainboard.GPU.readByte(address)
-
-                    else:
-                        self.log.error(
-                            'Unknown section, address = 0x%04X',
-                            address
-                        )
+        elif 0x40 <= address <= 0x7F:
+            return self._mainboard.GPU.readByte(0xFF00 | address)
+
+        return 0
 
     def readWord(self, address):
         """
@@ -258,101 +464,75 @@ class MMU:
         @param address int
         @return int
         """
-        return self.readByte(address) + self.readByte(address + 1) << 8
+        return self.readByte(address) | \
+            (self.readByte((address + 1) & 0xFFFF) << 8)
 
     def writeByte(self, address, value):
         """
         @param address int
         @param value int
         """
-        self.log.debug("[0x%06X] << 0x%06X", address, value)
-        adr = address & 0xF000
-
-        # ROM bank 0
-        # MBC1: Turn external RAM on
-        if 0x0000 <= adr <= 0x1000:
-            if self.cartType == 1:
-                self.ramOn = 1 if (value & 0xF) == 0xA else 0
-
-        elif 0x2000 <= adr <= 0x3000:
-            if self.cartType == 1:
-                self.romBank &= 0x60
-                value &= 0x1F
-                value = value or 1
-                self.romBank |= value
-                self.romOffs = self.romBank * 0x4000
-
-        # ROM bank 1
-        # MBC1: RAM bank switch
-        elif 0x4000 <= adr <= 0x5000:
-            if self.cartType == 1:
-                if self.mode > 0:
-                    self.ramBank = value & 3
-                    self.ramOffs = self.ramBank * 0x2000
-                else:
-                    self.romBank &= 0x1F
-                    self.romBank |= ((value & 3) << 5)
-                    self.romOffs = self.romBank * 0x4000
-
-        elif 0x6000 <= adr <= 0x7000:
-            if self.cartType == 1:
-                self.mode = value & 1
-
-        # VRAM
-        elif 0x8000 <= adr <= 0x9000:
-            self._mainboard.GPU.VRAM.writeByte(
-                self.ramOffs + (address & 0x1FFF),
-                value
-            )
+        page = self._writePages[address >> 8]
+        if page is not None:
+            page[address & 0xFF] = value & 0xFF
+        elif address < 0x8000:
+            self.mbc.writeRegister(address, value & 0xFF)
+        else:
+            self._writeIO(address, value)
 
-        # Extrnal RAM
-        elif 0xA000 <= adr <= 0xB000:
-            self.ERAM.writeByte(address & 0x1FFF, value)
+    def _writeIO(self, address, value):
+        value &= 0xFF
 
-        # Work RAM and echo
-        elif 0xC000 <= adr <= 0xE000:
-            self.WRAM.writeByte(address & 0x1FFF, value)
+        # VRAM tile data
+        if address < 0x9800:
+            self._mainboard.GPU.writeVRAM(address & 0x1FFF, value)
 
-        else:
-            adr = address & 0x0F00
+        # External RAM, disabled or banked out
+        elif 0xA000 <= address < 0xC000:
+            page = self._readPages[address >> 8]
+            if page is None:
+                self.mbc.writeRAM(address, value)
+            else:
+                # clean battery-backed page
+                self._writePages[address >> 8] = page
+                page[address & 0xFF] = value
+                self._eram.markDirty(
+                    self._eramOffsets[(address >> 8) - 0xA0], 0x100
+                )
 
-            # Echo RAM
-            if 0x000 <= adr <= 0xD00:
-                self.WRAM.writeByte(address & 0x1FFF, value)
+        # OAM
+        elif address < 0xFF00:
+            if (address & 0xFF) < 0xA0:
+                self._mainboard.GPU.ORAM.writeByte(address & 0xFF, value)
+                self._mainboard.GPU.updateORAM(address, value)
 
-            # 0AM
-            elif adr == 0xE00:
-                if (address & 0xFF) < 0xA0:
-                    self._mainboard.GPU.ORAM.writeByte(address & 0xFF, value)
-                    self._mainboard.GPU.updateORAM(address, value)
+        elif address == 0xFFFF:
+            self._mainboard.INT.IE = value
 
-            # Zeropage RAM, I/O
-            elif adr == 0xF00:
-                if address == 0xFFFF:
-                    self.IE = value
+        elif address > 0xFF7F:
+            self.ZRAM.writeByte(address & 0x7F, value)
 
-                elif address > 0xFF7F:
-                    self.ZRAM.writeByte(address & 0x7F, value)
+        else:
+            adr = address & 0xFF
 
-                else:
-                    adr = address & 0xF0
+            if adr == 0x00:
+                self._mainboard.KEY.writeByte(value)
 
-                    if adr == 0x00:
-                        adr = address & 0xF
-                        if adr == 0:
-                            self._mainboard.KEY.writeByte(value)
+            elif adr == 0x01 or adr == 0x02:
+                self._mainboard.SERIAL.writeByte(address, value)
 
-                        elif 4 <= adr <= 7:
-                            self._mainboard.TIMER.writeByte(address, value)
+            elif 0x04 <= adr <= 0x07:
+                self._mainboard.TIMER.writeByte(address, value)
 
-                        elif adr == 15:
-                            self.IF = value
+            elif adr == 0x0F:
+                self._mainboard.INT.IF = value
 
-                    elif 0x10 <= adr <= 0x30:
-                        return
+            elif adr == 0x50:
+                # Writing here disables the boot ROM
+                self.unmapBIOS()
 
-                    elif 0x40 <= adr <= 0x70:
-                        self._mainboard.GPU.writeByte(address, value)
+            elif 0x40 <= adr <= 0x7F:
+                self._mainboard.GPU.writeByte(address, value)
 
     def writeWord(self, address, value):
         """
@@ -360,26 +540,52 @@ class MMU:
         @param value int
         """
         self.writeByte(address, value & 0xFF)
-        # self.writeByte(address + 1, (value & 0xFF) >> 8)
-        self.writeByte(address + 1, value >> 8)
+        self.writeByte((address + 1) & 0xFFFF, value >> 8)
 
     def loadROM(self, romFileName):
+        """
+        maps the cartridge ROM from its file
+        @param romFileName str
+        """
         if not os.path.exists(romFileName):
-            raise FileNotFoundError
-
-        i = 0
-        with open(romFileName, 'rb') as f:
-            while True:
-                buffer = f.read(4096)
-
-                for d in range(len(buffer)):
-                    self.ROM.writeByte(i, d)
-                    i += 1
-
-                if len(buffer) == 0:
-                    self.cartType = self.ROM.readByte(0x147)
-                    self.log.debug(
-                        'ROM loaded, bytes %i, cartridge type %X' %
-                        (i, self.cartType)
-                    )
-                    break
+            raise FileNotFoundError(romFileName)
+
+        self.ROM = Cartridge.fromFile(romFileName, checked=self.CHECKED)
+        self.cartType = self.ROM.readByte(0x147)
+        self.log.debug(
+            'ROM loaded, bytes %i, banks %i, cartridge type %X' %
+            (self.ROM.size, self.ROM.banks, self.cartType)
+        )
+
+
+class DebugMMU(MMU):
+    """
+    MMU logging every memory access, with bounds-checked banks
+    """
+    CHECKED = True
+
+    def readByte(self, address):
+        value = super(DebugMMU, self).readByte(address)
+        self.log.debug("[0x%06X] >> 0x%06X", address, value)
+        return value
+
+    def writeByte(self, address, value):
+        self.log.debug("[0x%06X] << 0x%06X", address, value)
+        if not 0 <= address <= 0xFFFF:
+            self.log.error('Address out of range 0x%06X', address)
+        super(DebugMMU, self).writeByte(address, value)
+
+    def mapROMBank0(self, bank):
+        self.log.debug(
+            'Mapping ROM bank %i at 0x0000, BIOS %s',
+            bank, 'on' if self.inBios else 'off'
+        )
+        super(DebugMMU, self).mapROMBank0(bank)
+
+    def mapROMBank(self, bank):
+        self.log.debug('Mapping ROM bank %i at 0x4000', bank)
+        super(DebugMMU, self).mapROMBank(bank)
+
+    def mapERAMBank(self, bank):
+        self.log.debug('Mapping external RAM bank %s', bank)
+        super(DebugMMU, self).mapERAMBank(bank)
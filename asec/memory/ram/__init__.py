@@ -1,5 +1,95 @@
+import os
+import mmap
+
 from asec.memory import MemoryBank
 
 
 class RAM(MemoryBank):
     pass
+
+
+class BatteryRAM(RAM):
+    """
+    RAM kept by a battery, memory-mapped from a save file so it outlives
+    the process.
+
+    Writes land in the shared mapping, the file is only synced for the
+    granules marked dirty with markDirty(), when flush() is called.
+    The file is created, or zero-extended, to `size` on open; a longer
+    file, like one with clock data appended, keeps its tail.
+    """
+    def __init__(self, path, size, checked=False):
+        """
+        @param path str save file
+        @param size int bytes
+        @param checked bool
+        """
+        super(BatteryRAM, self).__init__(0, checked=checked)
+
+        self.path = path
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        self._size = size
+        self._buffer = self._mmap
+        self._view = memoryview(self._mmap)
+
+        # indexes of the granules written since the last flush
+        self._dirty = set()
+
+        self.log.debug('mapped %i bytes of "%s"', size, path)
+
+    def reset(self, fill=True):
+        # the battery keeps the contents through power cycles
+        pass
+
+    def loads(self, data):
+        super(BatteryRAM, self).loads(data)
+        self.markDirty(0, self._size)
+
+    def markDirty(self, address, length=1):
+        """
+        @param address int first byte written
+        @param length int bytes written
+        """
+        granularity = mmap.ALLOCATIONGRANULARITY
+        self._dirty.update(range(
+            address // granularity,
+            (address + length - 1) // granularity + 1
+        ))
+
+    @property
+    def dirty(self):
+        return bool(self._dirty)
+
+    def flush(self):
+        """
+        syncs the dirty granules to the save file
+        @return int granules written
+        """
+        if not self._dirty:
+            return 0
+        granularity = mmap.ALLOCATIONGRANULARITY
+        for granule in sorted(self._dirty):
+            offset = granule * granularity
+            self._mmap.flush(offset, min(granularity, self._size - offset))
+        count = len(self._dirty)
+        self._dirty.clear()
+        return count
+
+    def close(self):
+        """
+        flushes and unmaps, the bank is unusable afterwards
+        """
+        if self._mmap.closed:
+            return
+        self.flush()
+        self._view.release()
+        self._mmap.close()
+        self.log.debug('closed "%s"', self.path)
@@ -1,4 +1,23 @@
 from asec.memory import MemoryBank
 
+
 class ROM(MemoryBank):
-    pass
\ No newline at end of file
+    # switchable bank size
+    BANK_SIZE = 0x4000
+
+    @property
+    def banks(self):
+        """
+        number of whole banks
+        @return int
+        """
+        return max(1, self._size // self.BANK_SIZE)
+
+    def bank(self, number):
+        """
+        zero-copy view of a bank, the number wraps around the bank count
+        @param number int
+        @return memoryview
+        """
+        offset = (number % self.banks) * self.BANK_SIZE
+        return self._view[offset:offset + self.BANK_SIZE]
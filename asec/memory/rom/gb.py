@@ -0,0 +1,97 @@
+import os
+import mmap
+
+from asec.memory.rom import ROM
+
+
+class Cartridge(ROM):
+    """
+    GameBoy cartridge ROM, memory-mapped read-only from its file so that
+    loading copies nothing; pages are read from the OS cache as banks are
+    used.
+
+    The bank count comes from header byte 0x148, 32K shl N, and bank
+    numbers wrap around it like the address lines of the mapper do. Files
+    that can not be mapped as they are (compressed, shorter than 32K or
+    not a whole number of banks) are copied into memory instead.
+    """
+    # header byte 0x148 values past "32K shl N"
+    IRREGULAR_BANKS = {0x52: 72, 0x53: 80, 0x54: 96}
+
+    def __init__(self, data, checked=False):
+        """
+        @param data bytes-like ROM contents, an mmap is used as it is
+        @param checked bool
+        """
+        super(Cartridge, self).__init__(0, checked=checked)
+
+        size = len(data)
+        if size < 0x8000 or size % self.BANK_SIZE:
+            # padded up to whole banks
+            padded = max(0x8000, -(-size // self.BANK_SIZE) * self.BANK_SIZE)
+            buffer = bytearray(padded)
+            buffer[:size] = data
+            data = buffer
+
+        self._size = len(data)
+        self._buffer = data
+        self._view = memoryview(data)
+
+        self._banks = self._headerBanks()
+
+    @classmethod
+    def open(cls, fp, checked=False):
+        """
+        @param fp binary file, mapped when it is a plain file
+        @param checked bool
+        @return Cartridge
+        """
+        raw = getattr(fp, 'raw', None)
+        try:
+            fileno = raw.fileno() if raw is not None else None
+        except (AttributeError, OSError):
+            fileno = None
+
+        if fileno is not None and os.fstat(fileno).st_size:
+            data = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        else:
+            data = fp.read()
+        return cls(data, checked=checked)
+
+    @classmethod
+    def fromFile(cls, path, checked=False):
+        """
+        @param path str
+        @param checked bool
+        @return Cartridge
+        """
+        with open(path, 'rb') as fp:
+            return cls.open(fp, checked=checked)
+
+    def _headerBanks(self):
+        code = self._buffer[0x148]
+        if code <= 8:
+            banks = 2 << code
+        else:
+            banks = self.IRREGULAR_BANKS.get(code)
+        available = self._size // self.BANK_SIZE
+        if banks is None or banks > available:
+            if banks is not None:
+                self.log.warning(
+                    'header declares %i banks, the file holds %i',
+                    banks, available
+                )
+            banks = available
+        return banks
+
+    def reset(self, fill=True):
+        # read-only
+        pass
+
+    @property
+    def banks(self):
+        """
+        number of banks declared by the header
+        @return int
+        """
+        return self._banks
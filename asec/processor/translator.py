@@ -0,0 +1,314 @@
+import re
+import logging
+from operator import attrgetter
+
+from asec.processor import z80gen
+
+
+# Argument of a memory read helper call in an instruction body
+_READ = re.compile(r'\brb\(((?:[^()]|\([^()]*\))*)\)')
+_NAME = re.compile(r'\b[a-z_][a-z_0-9]*\b')
+
+
+class Block(object):
+    """
+    Translated straight-line code: run() executes every instruction of the
+    block and returns the m-cycles taken
+    """
+    __slots__ = (
+        'run', 'start', 'end', 'count', 'cycles', 'snapshot', 'source',
+        'polls'
+    )
+
+    def __init__(self, run, start, end, count, cycles, snapshot, source,
+                 polls=None):
+        self.run = run
+        self.start = start
+        self.end = end
+        self.count = count
+        # m-cycles of the longest path through the block
+        self.cycles = cycles
+        # code bytes to validate RAM blocks against, None for ROM
+        self.snapshot = snapshot
+        self.source = source
+        # for loops that only read memory, polls(R) gives the addresses read
+        self.polls = polls
+
+
+class BlockTranslator(object):
+    """
+    Translates basic blocks of guest code into Python functions.
+
+    A block starts at PC and runs up to and including the first
+    instruction that may change PC or the CPU state, so within a block all
+    cycle offsets are known and registers live in locals from start to
+    end. Instruction bodies are the z80gen snippets with the immediate
+    operands substituted.
+
+    Blocks are cached by (code bank, PC). ROM blocks stay valid for good,
+    RAM blocks do not cross a page and are checked against a snapshot of
+    their bytes before they run, so rewritten code is translated again.
+    """
+
+    # Longest block, in instructions
+    MAX_INSTRUCTIONS = 64
+
+    # Cache size limit, the cache is dropped when reached
+    MAX_BLOCKS = 0x4000
+
+    # IF, STAT, LYC and IE, writes to them can make an interrupt pending
+    INTERRUPT_REGISTERS = frozenset((0xFF0F, 0xFF41, 0xFF45, 0xFFFF))
+
+    # Memory write helpers; stack pushes through 'ww' are assumed to stay
+    # in RAM
+    STORES = frozenset(('wb', 'ww'))
+
+    # Registers a polling loop must leave unchanged to be fast-forwarded
+    STATE = ('a', 'f', 'b', 'c', 'd', 'e', 'h', 'l', 'sp')
+    _state = attrgetter(*STATE)
+
+    def __init__(self, processor, mmu):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.processor = processor
+        self.mmu = mmu
+        self._codePages = mmu._codePages
+        self._readPages = mmu._readPages
+
+        self.blocks = {}
+        self.translated = 0
+        self.skipped = 0
+
+    def reset(self):
+        self.blocks.clear()
+
+    def lookup(self, pc):
+        """
+        @param pc int
+        @return Block|None None when PC can not be translated
+        """
+        bank = self._codePages[pc >> 8]
+        if bank is None:
+            return None
+
+        key = (bank << 16) | pc
+        block = self.blocks.get(key)
+        if block is not None:
+            snapshot = block.snapshot
+            if snapshot is None or snapshot == \
+               self._readPages[pc >> 8][pc & 0xFF:(pc & 0xFF) + len(snapshot)]:
+                return block
+
+        block = self.translate(pc)
+        if block is not None:
+            if len(self.blocks) >= self.MAX_BLOCKS:
+                self.blocks.clear()
+            self.blocks[key] = block
+        return block
+
+    def decode(self, pc):
+        """
+        decodes the instructions of the block at PC
+        @param pc int
+        @return list of (address, Op, operand value)
+        """
+        readByte = self.mmu.readByte
+        # blocks do not leave the ROM bank or, in RAM and the BIOS, the page
+        if pc >= 0x8000 or self._codePages[pc >> 8] == self.mmu.BANK_BIOS:
+            limit = (pc | 0xFF) + 1
+        else:
+            limit = (pc | 0x3FFF) + 1
+
+        decoded = []
+        address = pc
+        while len(decoded) < self.MAX_INSTRUCTIONS:
+            op = z80gen.OPS[readByte(address)]
+            if op.code == 0xCB:
+                op = z80gen.CB_OPS[readByte((address + 1) & 0xFFFF)]
+            if op.body is None or address + op.length > limit:
+                break
+
+            operand = None
+            if op.operand == 'n16':
+                operand = readByte(address + 1) | (readByte(address + 2) << 8)
+            elif op.operand is not None:
+                operand = readByte(address + 1)
+                if op.operand == 'e8':
+                    operand -= (operand & 0x80) << 1
+
+            decoded.append((address, op, operand))
+            address += op.length
+
+            # ends on anything that changes PC or the CPU state, on writes
+            # to the MBC which may switch the code under the block, and on
+            # writes which may request an interrupt
+            if op.branches or 'self.' in op.body or 'R.' in op.body:
+                break
+            if op.operand == 'n16' and op.helpers & self.STORES:
+                # LD (nn),A and LD (nn),SP, the address is known
+                if operand < 0x8000 or operand in self.INTERRUPT_REGISTERS or \
+                   op is z80gen.OPS[0x08] and \
+                   operand + 1 in self.INTERRUPT_REGISTERS:
+                    break
+            elif op is z80gen.OPS[0xE0]:
+                if (0xFF00 | operand) in self.INTERRUPT_REGISTERS:
+                    break
+            elif 'wb' in op.helpers:
+                # through a register pair, or (C), the address is only
+                # known when the block runs
+                break
+
+        return decoded
+
+    def translate(self, pc):
+        """
+        @param pc int
+        @return Block|None
+        """
+        decoded = self.decode(pc)
+        if not decoded:
+            return None
+
+        end = decoded[-1][0] + decoded[-1][1].length
+
+        reads = set()
+        writes = set()
+        helpers = set()
+        for _, op, _ in decoded:
+            reads |= op.reads
+            writes |= op.writes
+            helpers |= op.helpers
+        reads.discard('pc')
+
+        lines = ['def block(self):', '    R = self.R']
+        if helpers:
+            lines.append('    CLOCK = self.CLOCK')
+            lines.append('    start = CLOCK.m')
+        for helper in sorted(helpers):
+            lines.append('    %s = self.%s' % (helper, z80gen.HELPERS[helper]))
+        for register in z80gen.REGISTERS:
+            if register in reads:
+                lines.append('    %s = R.%s' % (register, register))
+
+        cycles = 0
+        last = decoded[-1][1]
+        for i, (address, op, operand) in enumerate(decoded):
+            lines.append('    # %04X  %s' % (address, op.mnemonic))
+            if op.helpers:
+                # I/O reads (DIV, TIMA, LY) see the exact cycle
+                lines.append('    CLOCK.m = start + %i' % cycles)
+            if 'pc' in op.reads:
+                lines.append('    pc = 0x%04X' % ((address + op.length) & 0xFFFF))
+            if op.taken is not None:
+                lines.append('    m = %i' % op.cycles)
+
+            if operand is None:
+                body = op.source()
+            elif op.operand == 'e8':
+                body = op.source('(%i)' % operand)
+            else:
+                body = op.source('0x%X' % operand)
+            lines.append(z80gen.indent(body))
+
+            if i < len(decoded) - 1:
+                cycles += op.cycles
+
+        if not last.branches:
+            writes.add('pc')
+            lines.append('    pc = 0x%04X' % (end & 0xFFFF))
+        for register in z80gen.REGISTERS:
+            if register in writes:
+                lines.append('    R.%s = %s' % (register, register))
+
+        if last.taken is not None:
+            lines.append('    return %i + m' % cycles)
+            longest = cycles + max(last.cycles, last.taken)
+        else:
+            lines.append('    return %i' % (cycles + last.cycles))
+            longest = cycles + last.cycles
+
+        polls = self._polls(pc, decoded, writes)
+        if polls is not None:
+            lines.append('')
+            lines.append('def polls(R):')
+            lines.append('    return (%s,)' % ', '.join(polls))
+
+        source = '\n'.join(lines) + '\n'
+        bank = self.mmu.codeBank(pc)
+        scope = z80gen.compileSource(
+            source, '<block %04X:%04X>' % (bank, pc), cache=False
+        )
+
+        snapshot = None
+        if pc >= 0x8000:
+            snapshot = bytes(
+                self._readPages[pc >> 8][pc & 0xFF:(pc & 0xFF) + end - pc]
+            )
+
+        self.translated += 1
+        return Block(
+            scope['block'].__get__(self.processor), pc, end,
+            len(decoded), longest, snapshot, source, scope.get('polls')
+        )
+
+    def _polls(self, pc, decoded, writes):
+        """
+        recognizes polling loops: blocks branching back to their start
+        that only read memory, at addresses the loop itself does not change
+        @param pc int
+        @param decoded list
+        @param writes set registers written by the block
+        @return list|None address expressions over R
+        """
+        address, last, operand = decoded[-1]
+        if last.taken is None or last.operand is None:
+            return None
+        if last.operand == 'e8':
+            target = (address + last.length + operand) & 0xFFFF
+        else:
+            target = operand
+        if target != pc:
+            return None
+
+        polls = []
+        for _, op, operand in decoded:
+            if not op.helpers:
+                continue
+            if op.helpers != set(['rb']):
+                return None
+            if operand is None:
+                body = op.source()
+            else:
+                body = op.source('0x%X' % operand)
+            for argument in _READ.findall(body):
+                for name in _NAME.findall(argument):
+                    if name not in self.STATE or name in writes:
+                        return None
+                polls.append(_NAME.sub(r'R.\g<0>', argument))
+        return polls or None
+
+    def spin(self, block, budget):
+        """
+        runs a polling block, then repeats it without executing for as long
+        as it would read the same values: until `budget` m-cycles, which
+        the caller bounds by the next scheduled event
+        @param block Block with polls
+        @param budget int
+        @return tuple m-cycles, instructions
+        """
+        R = self.processor.R
+        before = self._state(R)
+        m = block.run()
+        if R.pc != block.start or budget < m * 2:
+            return m, block.count
+        # the iteration must have reached a fixed point
+        if before != self._state(R):
+            return m, block.count
+        volatile = self.mmu.VOLATILE
+        for address in block.polls(R):
+            if address in volatile:
+                return m, block.count
+
+        iterations = budget // m
+        self.skipped += iterations - 1
+        return m * iterations, block.count * iterations
@@ -0,0 +1,564 @@
+"""
+GameBoy CPU (LR35902) instruction handlers, generated from an opcode table.
+
+Every opcode is described once by an Op: handler name, mnemonic, immediate
+operand, m-cycles, flag effects and a body snippet. Snippets work on the
+registers held in locals (a, f, b, c, d, e, h, l, sp, pc), refer to the
+immediate operand as {n} and access memory through rb/wb/rw/ww, so the same
+snippet can be wrapped into a standalone handler or inlined into a larger
+function. Optimisations belong here, in the templates, once.
+
+Print the generated source with:
+    python -m asec.processor.z80gen
+"""
+import re
+import sys
+import linecache
+
+
+# Register locals, in load order
+REGISTERS = ('a', 'f', 'b', 'c', 'd', 'e', 'h', 'l', 'sp', 'pc')
+
+# Memory helpers available to snippets, bound from the processor
+HELPERS = {
+    'rb': '_readByte',
+    'wb': '_writeByte',
+    'rw': '_readWord',
+    'ww': '_writeWord',
+}
+
+# Immediate operand kinds and their length in bytes
+OPERANDS = {None: 0, 'n8': 1, 'e8': 1, 'n16': 2}
+
+# Flag lookup tables, indexed by the 8-bit result
+FZ = tuple(0x80 if v == 0 else 0 for v in range(256))
+FINC = tuple(FZ[v] | (0x20 if v & 0xF == 0 else 0) for v in range(256))
+FDEC = tuple(FZ[v] | 0x40 | (0x20 if v & 0xF == 0xF else 0) for v in range(256))
+
+# Names visible to generated code
+NAMESPACE = {'FZ': FZ, 'FINC': FINC, 'FDEC': FDEC}
+
+_TOKENS = re.compile(r'(?<![\w.])([a-z]\w*)\b')
+_ASSIGNED = re.compile(
+    r'^\s*(%s)\s*(?:[-+&|^]|<<|>>)?=(?!=)' % '|'.join(REGISTERS), re.M
+)
+_CONDITIONAL = re.compile(
+    r'^\s+(%s)\s*=(?!=)' % '|'.join(REGISTERS), re.M
+)
+_PLAIN_ASSIGNMENT = re.compile(
+    r'^(\s*)(?:%s)\s*=(?!=)' % '|'.join(REGISTERS), re.M
+)
+
+
+class Op(object):
+    """
+    One opcode: how it is decoded, what it costs and what it does
+    """
+    __slots__ = (
+        'code', 'prefix', 'name', 'mnemonic', 'operand', 'cycles', 'taken',
+        'flags', 'body', 'reads', 'writes', 'helpers', 'length'
+    )
+
+    def __init__(self, code, name, mnemonic, cycles, flags='----',
+                 body=None, operand=None, prefix=None):
+        """
+        @param code int
+        @param name str handler name
+        @param mnemonic str
+        @param cycles int|tuple m-cycles, (not taken, taken) for branches
+        @param flags str effect on Z, N, H, C: '-' kept, '0'/'1' reset/set,
+                         letter computed
+        @param body str|None snippet, None for hand-written handlers
+        @param operand str|None one of OPERANDS
+        @param prefix int|None 0xCB for the extended table
+        """
+        self.code = code
+        self.prefix = prefix
+        self.name = name
+        self.mnemonic = mnemonic
+        if isinstance(cycles, tuple):
+            self.cycles, self.taken = cycles
+        else:
+            self.cycles, self.taken = cycles, None
+        self.flags = flags
+        self.body = body
+        self.operand = operand
+        self.length = 1 + OPERANDS[operand] + (1 if prefix else 0)
+
+        body = body or ''
+        tokens = set(_TOKENS.findall(body))
+        self.writes = frozenset(_ASSIGNED.findall(body))
+        # plain assignment targets are not reads, unless the assignment
+        # is conditional (indented) and the old value may survive
+        self.reads = frozenset(
+            r for r in _TOKENS.findall(_PLAIN_ASSIGNMENT.sub(r'\1', body))
+            if r in REGISTERS
+        ) | frozenset(_CONDITIONAL.findall(body))
+        self.helpers = frozenset(t for t in tokens if t in HELPERS)
+
+    @property
+    def branches(self):
+        """
+        the snippet may change PC
+        @return bool
+        """
+        return 'pc' in self.writes
+
+    def source(self, n='n'):
+        """
+        snippet with the immediate operand substituted
+        @param n str expression of the operand value
+        @return str
+        """
+        return self.body.replace('{n}', n)
+
+    def __repr__(self):
+        return '<Op %s%02X %s>' % (
+            'CB' if self.prefix else '', self.code, self.mnemonic
+        )
+
+
+###
+# Opcode table
+###
+
+# Register operands in opcode order, 'm' is (HL)
+R8 = ('b', 'c', 'd', 'e', 'h', 'l', 'm', 'a')
+NAMES8 = {'b': 'B', 'c': 'C', 'd': 'D', 'e': 'E', 'h': 'H', 'l': 'L',
+          'm': '(HL)', 'a': 'A'}
+
+# Register pairs: name, high, low
+R16 = (('BC', 'b', 'c'), ('DE', 'd', 'e'), ('HL', 'h', 'l'), ('SP', None, None))
+
+# Conditions: name, test
+CONDITIONS = (
+    ('NZ', 'not f & 0x80'), ('Z', 'f & 0x80'),
+    ('NC', 'not f & 0x10'), ('C', 'f & 0x10'),
+)
+
+ALU_FLAGS = {
+    'ADD': 'Z0HC', 'ADC': 'Z0HC', 'SUB': 'Z1HC', 'SBC': 'Z1HC',
+    'AND': 'Z010', 'XOR': 'Z000', 'OR': 'Z000', 'CP': 'Z1HC',
+}
+
+ALU = {
+    'ADD': 'v = {v}\n'
+           'r = a + v\n'
+           'f = FZ[r & 255] | ((a ^ v ^ r) & 0x10) << 1 | (r >> 4) & 0x10\n'
+           'a = r & 255',
+    'ADC': 'v = {v}\n'
+           'r = a + v + ((f >> 4) & 1)\n'
+           'f = FZ[r & 255] | ((a ^ v ^ r) & 0x10) << 1 | (r >> 4) & 0x10\n'
+           'a = r & 255',
+    'SUB': 'v = {v}\n'
+           'r = a - v\n'
+           'f = FZ[r & 255] | 0x40 | ((a ^ v ^ r) & 0x10) << 1 | (r >> 4) & 0x10\n'
+           'a = r & 255',
+    'SBC': 'v = {v}\n'
+           'r = a - v - ((f >> 4) & 1)\n'
+           'f = FZ[r & 255] | 0x40 | ((a ^ v ^ r) & 0x10) << 1 | (r >> 4) & 0x10\n'
+           'a = r & 255',
+    'AND': 'a &= {v}\n'
+           'f = FZ[a] | 0x20',
+    'XOR': 'a ^= {v}\n'
+           'f = FZ[a]',
+    'OR': 'a |= {v}\n'
+          'f = FZ[a]',
+    'CP': 'v = {v}\n'
+          'r = a - v\n'
+          'f = FZ[r & 255] | 0x40 | ((a ^ v ^ r) & 0x10) << 1 | (r >> 4) & 0x10',
+}
+
+# CB shifts and rotates: value v in, result r out
+SHIFTS = (
+    ('RLC', 'r = ((v << 1) | (v >> 7)) & 255\n'
+            'f = FZ[r] | (v >> 7) << 4'),
+    ('RRC', 'r = ((v >> 1) | (v << 7)) & 255\n'
+            'f = FZ[r] | (v & 1) << 4'),
+    ('RL', 'r = ((v << 1) | ((f >> 4) & 1)) & 255\n'
+           'f = FZ[r] | (v >> 7) << 4'),
+    ('RR', 'r = (v >> 1) | ((f & 0x10) << 3)\n'
+           'f = FZ[r] | (v & 1) << 4'),
+    ('SLA', 'r = (v << 1) & 255\n'
+            'f = FZ[r] | (v >> 7) << 4'),
+    ('SRA', 'r = (v >> 1) | (v & 0x80)\n'
+            'f = FZ[r] | (v & 1) << 4'),
+    ('SWAP', 'r = ((v << 4) | (v >> 4)) & 255\n'
+             'f = FZ[r]'),
+    ('SRL', 'r = v >> 1\n'
+            'f = FZ[r] | (v & 1) << 4'),
+)
+
+HL = '(h << 8) | l'
+
+
+def _get(r):
+    return 'rb(%s)' % HL if r == 'm' else r
+
+
+def _pair(high, low):
+    return 'sp' if high is None else '((%s << 8) | %s)' % (high, low)
+
+
+def _setPair(high, low, value):
+    if high is None:
+        return 'sp = %s' % value
+    return 'x = %s\n%s = x >> 8\n%s = x & 255' % (value, high, low)
+
+
+def _table():
+    ops = [None] * 256
+
+    def op(code, *args, **kwargs):
+        assert ops[code] is None, hex(code)
+        ops[code] = Op(code, *args, **kwargs)
+
+    # 00-3F: misc, 16-bit loads and arithmetic
+    op(0x00, 'NOP', 'NOP', 1, body='pass')
+    op(0x10, 'STOP', 'STOP', 1, operand='n8', body='pass')
+    op(0x08, 'LDmmSP', 'LD (nn),SP', 5, operand='n16', body='ww({n}, sp)')
+
+    for i, (name, high, low) in enumerate(R16):
+        base = i << 4
+        op(base | 0x01, 'LD%snn' % name, 'LD %s,nn' % name, 3, operand='n16',
+           body=_setPair(high, low, '{n}') if high is None else
+           '%s = {n} >> 8\n%s = {n} & 255' % (high, low))
+        op(base | 0x03, 'INC%s' % name, 'INC %s' % name, 2,
+           body=_setPair(high, low, '(%s + 1) & 0xFFFF' % _pair(high, low)))
+        op(base | 0x0B, 'DEC%s' % name, 'DEC %s' % name, 2,
+           body=_setPair(high, low, '(%s - 1) & 0xFFFF' % _pair(high, low)))
+        op(base | 0x09, 'ADDHL%s' % name, 'ADD HL,%s' % name, 2, '-0HC',
+           body='x = %s\n'
+                'v = %s\n'
+                'r = x + v\n'
+                'f = (f & 0x80) | ((x ^ v ^ r) & 0x1000) >> 7 | (r >> 12) & 0x10\n'
+                'h = (r >> 8) & 255\n'
+                'l = r & 255' % (HL, _pair(high, low)))
+
+    op(0x02, 'LDBCmA', 'LD (BC),A', 2, body='wb((b << 8) | c, a)')
+    op(0x12, 'LDDEmA', 'LD (DE),A', 2, body='wb((d << 8) | e, a)')
+    op(0x22, 'LDHLIA', 'LD (HL+),A', 2,
+       body='x = %s\nwb(x, a)\nx = (x + 1) & 0xFFFF\nh = x >> 8\nl = x & 255' % HL)
+    op(0x32, 'LDHLDA', 'LD (HL-),A', 2,
+       body='x = %s\nwb(x, a)\nx = (x - 1) & 0xFFFF\nh = x >> 8\nl = x & 255' % HL)
+    op(0x0A, 'LDABCm', 'LD A,(BC)', 2, body='a = rb((b << 8) | c)')
+    op(0x1A, 'LDADEm', 'LD A,(DE)', 2, body='a = rb((d << 8) | e)')
+    op(0x2A, 'LDAHLI', 'LD A,(HL+)', 2,
+       body='x = %s\na = rb(x)\nx = (x + 1) & 0xFFFF\nh = x >> 8\nl = x & 255' % HL)
+    op(0x3A, 'LDAHLD', 'LD A,(HL-)', 2,
+       body='x = %s\na = rb(x)\nx = (x - 1) & 0xFFFF\nh = x >> 8\nl = x & 255' % HL)
+
+    for i, r in enumerate(R8):
+        suffix = 'HLm' if r == 'm' else 'r_%s' % r
+        if r == 'm':
+            op(0x34, 'INCHLm', 'INC (HL)', 3, 'Z0H-',
+               body='x = %s\nv = (rb(x) + 1) & 255\nf = (f & 0x10) | FINC[v]\nwb(x, v)' % HL)
+            op(0x35, 'DECHLm', 'DEC (HL)', 3, 'Z1H-',
+               body='x = %s\nv = (rb(x) - 1) & 255\nf = (f & 0x10) | FDEC[v]\nwb(x, v)' % HL)
+            op(0x36, 'LDHLmn', 'LD (HL),n', 3, operand='n8', body='wb(%s, {n})' % HL)
+            continue
+        op((i << 3) | 0x04, 'INC%s' % suffix, 'INC %s' % NAMES8[r], 1, 'Z0H-',
+           body='%s = (%s + 1) & 255\nf = (f & 0x10) | FINC[%s]' % (r, r, r))
+        op((i << 3) | 0x05, 'DEC%s' % suffix, 'DEC %s' % NAMES8[r], 1, 'Z1H-',
+           body='%s = (%s - 1) & 255\nf = (f & 0x10) | FDEC[%s]' % (r, r, r))
+        op((i << 3) | 0x06, 'LDrn_%s' % r, 'LD %s,n' % NAMES8[r], 2,
+           operand='n8', body='%s = {n}' % r)
+
+    op(0x07, 'RLCA', 'RLCA', 1, '000C',
+       body='a = ((a << 1) | (a >> 7)) & 255\nf = (a & 1) << 4')
+    op(0x0F, 'RRCA', 'RRCA', 1, '000C',
+       body='f = (a & 1) << 4\na = ((a >> 1) | (a << 7)) & 255')
+    op(0x17, 'RLA', 'RLA', 1, '000C',
+       body='r = (a << 1) | ((f >> 4) & 1)\nf = (r >> 4) & 0x10\na = r & 255')
+    op(0x1F, 'RRA', 'RRA', 1, '000C',
+       body='r = a | ((f & 0x10) << 4)\nf = (a & 1) << 4\na = r >> 1')
+
+    op(0x18, 'JRn', 'JR e', 3, operand='e8', body='pc = (pc + {n}) & 0xFFFF')
+    for i, (name, test) in enumerate(CONDITIONS):
+        op(0x20 | (i << 3), 'JR%sn' % name, 'JR %s,e' % name, (2, 3),
+           operand='e8',
+           body='if %s:\n    pc = (pc + {n}) & 0xFFFF\n    m = 3' % test)
+
+    op(0x27, 'DAA', 'DAA', 1, 'Z-0C',
+       body='if f & 0x40:\n'
+            '    if f & 0x10:\n'
+            '        a -= 0x60\n'
+            '    if f & 0x20:\n'
+            '        a -= 6\n'
+            'else:\n'
+            '    if f & 0x10 or a > 0x99:\n'
+            '        a += 0x60\n'
+            '        f |= 0x10\n'
+            '    if f & 0x20 or (a & 0xF) > 9:\n'
+            '        a += 6\n'
+            'a &= 255\n'
+            'f = FZ[a] | (f & 0x50)')
+    op(0x2F, 'CPL', 'CPL', 1, '-11-', body='a ^= 255\nf |= 0x60')
+    op(0x37, 'SCF', 'SCF', 1, '-001', body='f = (f & 0x80) | 0x10')
+    op(0x3F, 'CCF', 'CCF', 1, '-00C', body='f = (f & 0x90) ^ 0x10')
+
+    # 40-7F: 8-bit loads
+    for i, dst in enumerate(R8):
+        for j, src in enumerate(R8):
+            code = 0x40 | (i << 3) | j
+            if dst == 'm' and src == 'm':
+                op(code, 'HALT', 'HALT', 1, body='self._HALT = 1')
+            elif dst == 'm':
+                op(code, 'LDHLmr_%s' % src, 'LD (HL),%s' % NAMES8[src], 2,
+                   body='wb(%s, %s)' % (HL, src))
+            elif src == 'm':
+                op(code, 'LDrHLm_%s' % dst, 'LD %s,(HL)' % NAMES8[dst], 2,
+                   body='%s = rb(%s)' % (dst, HL))
+            elif src == dst:
+                op(code, 'LDrr_%s%s' % (dst, src),
+                   'LD %s,%s' % (NAMES8[dst], NAMES8[src]), 1, body='pass')
+            else:
+                op(code, 'LDrr_%s%s' % (dst, src),
+                   'LD %s,%s' % (NAMES8[dst], NAMES8[src]), 1,
+                   body='%s = %s' % (dst, src))
+
+    # 80-BF: 8-bit arithmetic, C6-FE: with immediate operand
+    for i, name in enumerate(('ADD', 'ADC', 'SUB', 'SBC', 'AND', 'XOR', 'OR', 'CP')):
+        for j, src in enumerate(R8):
+            op(0x80 | (i << 3) | j,
+               '%sHL' % name if src == 'm' else '%sr_%s' % (name, src),
+               '%s A,%s' % (name, NAMES8[src]), 2 if src == 'm' else 1,
+               ALU_FLAGS[name], body=ALU[name].replace('{v}', _get(src)))
+        op(0xC6 | (i << 3), '%sn' % name, '%s A,n' % name, 2,
+           ALU_FLAGS[name], operand='n8', body=ALU[name].replace('{v}', '{n}'))
+
+    # C0-FF: control flow, stack, I/O
+    ret = 'pc = rw(sp)\nsp = (sp + 2) & 0xFFFF'
+    call = 'sp = (sp - 2) & 0xFFFF\nww(sp, pc)\npc = {n}'
+    for i, (name, test) in enumerate(CONDITIONS):
+        base = 0xC0 | (i << 3)
+        op(base, 'RET%s' % name, 'RET %s' % name, (2, 5),
+           body='if %s:\n    pc = rw(sp)\n    sp = (sp + 2) & 0xFFFF\n    m = 5' % test)
+        op(base | 0x02, 'JP%snn' % name, 'JP %s,nn' % name, (3, 4),
+           operand='n16', body='if %s:\n    pc = {n}\n    m = 4' % test)
+        op(base | 0x04, 'CALL%snn' % name, 'CALL %s,nn' % name, (3, 6),
+           operand='n16',
+           body='if %s:\n'
+                '    sp = (sp - 2) & 0xFFFF\n'
+                '    ww(sp, pc)\n'
+                '    pc = {n}\n'
+                '    m = 6' % test)
+
+    for i, (name, high, low) in enumerate(R16):
+        base = 0xC1 | (i << 4)
+        if high is None:
+            name, high, low = 'AF', 'a', 'f'
+            pop = 'x = rw(sp)\na = x >> 8\nf = x & 0xF0'
+        else:
+            pop = 'x = rw(sp)\n%s = x >> 8\n%s = x & 255' % (high, low)
+        op(base, 'POP%s' % name, 'POP %s' % name, 3,
+           'ZNHC' if name == 'AF' else '----',
+           body=pop + '\nsp = (sp + 2) & 0xFFFF')
+        op(base | 0x04, 'PUSH%s' % name, 'PUSH %s' % name, 4,
+           body='sp = (sp - 2) & 0xFFFF\nww(sp, (%s << 8) | %s)' % (high, low))
+
+    for vector in range(0, 0x40, 8):
+        op(0xC7 | vector, 'RST%02X' % vector, 'RST %02XH' % vector, 4,
+           body=call.replace('{n}', '0x%02X' % vector))
+
+    op(0xC3, 'JPnn', 'JP nn', 4, operand='n16', body='pc = {n}')
+    op(0xE9, 'JPHL', 'JP (HL)', 1, body='pc = %s' % HL)
+    op(0xC9, 'RET', 'RET', 4, body=ret)
+    op(0xD9, 'RETI', 'RETI', 4, body=ret + '\nself.interrupts.ime = 1')
+    op(0xCD, 'CALLnn', 'CALL nn', 6, operand='n16', body=call)
+    op(0xCB, 'MAPcb', 'PREFIX CB', 1)
+
+    op(0xE0, 'LDIOnA', 'LDH (n),A', 3, operand='n8', body='wb(0xFF00 | {n}, a)')
+    op(0xF0, 'LDAIOn', 'LDH A,(n)', 3, operand='n8', body='a = rb(0xFF00 | {n})')
+    op(0xE2, 'LDIOCA', 'LD (C),A', 2, body='wb(0xFF00 | c, a)')
+    op(0xF2, 'LDAIOC', 'LD A,(C)', 2, body='a = rb(0xFF00 | c)')
+    op(0xEA, 'LDmmA', 'LD (nn),A', 4, operand='n16', body='wb({n}, a)')
+    op(0xFA, 'LDAmm', 'LD A,(nn)', 4, operand='n16', body='a = rb({n})')
+
+    op(0xE8, 'ADDSPn', 'ADD SP,e', 4, '00HC', operand='e8',
+       body='r = sp + {n}\n'
+            'x = sp ^ {n} ^ r\n'
+            'f = (x & 0x10) << 1 | (x & 0x100) >> 4\n'
+            'sp = r & 0xFFFF')
+    op(0xF8, 'LDHLSPn', 'LD HL,SP+e', 3, '00HC', operand='e8',
+       body='r = sp + {n}\n'
+            'x = sp ^ {n} ^ r\n'
+            'f = (x & 0x10) << 1 | (x & 0x100) >> 4\n'
+            'h = (r >> 8) & 255\n'
+            'l = r & 255')
+    op(0xF9, 'LDSPHL', 'LD SP,HL', 2, body='sp = %s' % HL)
+
+    op(0xF3, 'DI', 'DI', 1, body='self.interrupts.ime = 0')
+    op(0xFB, 'EI', 'EI', 1, body='self.interrupts.enable()')
+
+    # Not decoded by the hardware
+    for code in (0xD3, 0xDB, 0xDD, 0xE3, 0xE4, 0xEB, 0xEC, 0xED, 0xF4, 0xFC, 0xFD):
+        op(code, 'XXX', '-', 1)
+
+    return ops
+
+
+def _cbTable():
+    ops = [None] * 256
+
+    for i, r in enumerate(R8):
+        if r == 'm':
+            load, store, cycles = 'x = %s\nv = rb(x)' % HL, 'wb(x, r)', 4
+        else:
+            load, store, cycles = 'v = %s' % r, '%s = r' % r, 2
+        suffix = 'HL' if r == 'm' else 'r_%s' % r
+
+        for j, (name, body) in enumerate(SHIFTS):
+            ops[(j << 3) | i] = Op(
+                (j << 3) | i, '%s%s' % (name, suffix),
+                '%s %s' % (name, NAMES8[r]), cycles,
+                'Z000' if name == 'SWAP' else 'Z00C',
+                body='%s\n%s\n%s' % (load, body, store), prefix=0xCB
+            )
+
+        for bit in range(8):
+            mask = 1 << bit
+            code = (bit << 3) | i
+            ops[0x40 | code] = Op(
+                0x40 | code, 'BIT%i%s' % (bit, r),
+                'BIT %i,%s' % (bit, NAMES8[r]), 3 if r == 'm' else 2, 'Z01-',
+                body='f = (f & 0x10) | 0x20 | FZ[%s & 0x%02X]' % (_get(r), mask),
+                prefix=0xCB
+            )
+            if r == 'm':
+                res = 'x = %s\nwb(x, rb(x) & 0x%02X)' % (HL, 0xFF ^ mask)
+                set_ = 'x = %s\nwb(x, rb(x) | 0x%02X)' % (HL, mask)
+            else:
+                res = '%s &= 0x%02X' % (r, 0xFF ^ mask)
+                set_ = '%s |= 0x%02X' % (r, mask)
+            ops[0x80 | code] = Op(
+                0x80 | code, 'RES%i%s' % (bit, r),
+                'RES %i,%s' % (bit, NAMES8[r]), cycles, body=res, prefix=0xCB
+            )
+            ops[0xC0 | code] = Op(
+                0xC0 | code, 'SET%i%s' % (bit, r),
+                'SET %i,%s' % (bit, NAMES8[r]), cycles, body=set_, prefix=0xCB
+            )
+
+    return ops
+
+
+OPS = _table()
+CB_OPS = _cbTable()
+
+
+###
+# Handler generation
+###
+
+def indent(text, level=1):
+    pad = '    ' * level
+    return '\n'.join(pad + line if line else line for line in text.split('\n'))
+
+
+def fetchSource(operand):
+    """
+    reads the immediate operand at pc into n
+    @param operand str|None
+    @return str
+    """
+    if operand == 'n8':
+        return 'n = rb(pc)\npc = (pc + 1) & 0xFFFF'
+    if operand == 'e8':
+        return 'n = rb(pc)\nn -= (n & 0x80) << 1\npc = (pc + 1) & 0xFFFF'
+    if operand == 'n16':
+        return 'n = rw(pc)\npc = (pc + 2) & 0xFFFF'
+    return ''
+
+
+def handlerSource(op):
+    """
+    source of a processor method executing one instruction, PC already
+    points past the opcode
+    @param op Op
+    @return str
+    """
+    fetch = fetchSource(op.operand)
+    reads = set(op.reads)
+    writes = set(op.writes)
+    helpers = set(op.helpers)
+    if fetch:
+        reads.add('pc')
+        writes.add('pc')
+        helpers.add('rw' if op.operand == 'n16' else 'rb')
+
+    lines = [
+        'def %s(self):' % op.name,
+        '    """%s  %sm  %s"""' % (
+            op.mnemonic,
+            op.cycles if op.taken is None else '%i/%i' % (op.cycles, op.taken),
+            op.flags
+        ),
+        '    R = self.R',
+    ]
+    for helper in sorted(helpers):
+        lines.append('    %s = self.%s' % (helper, HELPERS[helper]))
+    for register in REGISTERS:
+        if register in reads:
+            lines.append('    %s = R.%s' % (register, register))
+    if op.taken is not None:
+        lines.append('    m = %i' % op.cycles)
+    if fetch:
+        lines.append(indent(fetch))
+    lines.append(indent(op.source()))
+    for register in REGISTERS:
+        if register in writes:
+            lines.append('    R.%s = %s' % (register, register))
+    lines.append('    R.m = %s' % ('m' if op.taken is not None else op.cycles))
+    return '\n'.join(lines) + '\n'
+
+
+def moduleSource():
+    """
+    @return str source of every generated handler
+    """
+    seen = set()
+    chunks = []
+    for op in OPS + CB_OPS:
+        if op.body is None or op.name in seen:
+            continue
+        seen.add(op.name)
+        chunks.append(handlerSource(op))
+    return '\n\n'.join(chunks)
+
+
+def compileSource(source, filename, namespace=None, cache=True):
+    """
+    compiles generated source
+    @param source str
+    @param filename str
+    @param namespace dict extra globals
+    @param cache bool register with linecache, so that tracebacks show
+                      the generated lines
+    @return dict
+    """
+    scope = dict(NAMESPACE)
+    if namespace:
+        scope.update(namespace)
+    if cache:
+        linecache.cache[filename] = (
+            len(source), None, source.splitlines(True), filename
+        )
+    exec(compile(source, filename, 'exec'), scope)
+    return scope
+
+
+def handlers():
+    """
+    generated handler functions
+    @return dict name -> function(processor)
+    """
+    scope = compileSource(moduleSource(), '<z80gen>')
+    return dict(
+        (op.name, scope[op.name])
+        for op in OPS + CB_OPS if op.body is not None
+    )
+
+
+if __name__ == '__main__':
+    sys.stdout.write(moduleSource())
@@ -0,0 +1,239 @@
+"""
+Compressed ROMs: gzip files (.gbz, .gz, ...) and zip archives holding
+one or more ROMs.
+
+A ROM is decompressed once into an on-disk cache and then loaded from
+there like any other ROM file, memory-mapped. Cache files are named after
+the SHA-1 of the ROM, computed on the way through, so the same ROM
+shipped in different archives is stored once and two ROMs never share a
+file. An index maps the archive path, size, modification time and member
+to that digest, so the cached file is found again without decompressing
+anything. Listing reads the zip central directory, or the gzip header
+and trailer, never the payload.
+"""
+import os
+import gzip
+import struct
+import hashlib
+import logging
+import zipfile
+import tempfile
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+
+GZIP = 'gzip'
+ZIP = 'zip'
+
+# ROM file extensions, to pick ROMs out of archives
+ROM_EXTENSIONS = ('gb', 'gbc', 'gba', 'sms', 'smc')
+
+# compressed ROM extensions and the extension of the ROM inside
+COMPRESSED_EXTENSIONS = {'gbz': 'gb', 'smz': 'sms'}
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.asec', 'cache')
+
+# subdirectory of the cache holding the digest of every archive member
+INDEX = 'index'
+
+# bytes decompressed per read
+CHUNK_SIZE = 1 << 20
+
+# gzip header flags
+_FEXTRA = 0x04
+_FNAME = 0x08
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def archiveType(path):
+    """
+    @param path str
+    @return str|None GZIP, ZIP or None for an uncompressed file
+    """
+    with open(path, 'rb') as fp:
+        magic = fp.read(4)
+    if magic[:2] == GZIP_MAGIC:
+        return GZIP
+    if magic == ZIP_MAGIC:
+        return ZIP
+    return None
+
+
+def isROM(name):
+    """
+    @param name str file name
+    @return bool
+    """
+    ext = name.rsplit('.', 1)[-1].lower()
+    return ext in ROM_EXTENSIONS or ext in COMPRESSED_EXTENSIONS
+
+
+class ArchiveEntry(object):
+    def __init__(self, name, size, crc32):
+        """
+        @param name str
+        @param size int decompressed bytes
+        @param crc32 int of the decompressed data
+        """
+        self.name = name
+        self.size = size
+        self.crc32 = crc32
+
+    def __repr__(self):
+        return 'ArchiveEntry(%r, %i, 0x%08x)' % (
+            self.name, self.size, self.crc32
+        )
+
+
+def _gzipName(path):
+    # the name stored in the header, or the file name without the suffix
+    with open(path, 'rb') as fp:
+        header = fp.read(10)
+        if len(header) < 10 or header[:2] != GZIP_MAGIC:
+            raise ArchiveError('Not a gzip file "%s"' % path)
+        flags = header[3]
+        if flags & _FEXTRA:
+            length, = struct.unpack('<H', fp.read(2))
+            fp.seek(length, os.SEEK_CUR)
+        if flags & _FNAME:
+            name = bytearray()
+            while True:
+                c = fp.read(1)
+                if not c or c == b'\0':
+                    break
+                name += c
+            if name:
+                return os.path.basename(name.decode('latin-1'))
+
+    name = os.path.basename(path)
+    stem, ext = os.path.splitext(name)
+    ext = ext[1:].lower()
+    if ext in COMPRESSED_EXTENSIONS:
+        return '%s.%s' % (stem, COMPRESSED_EXTENSIONS[ext])
+    return stem if ext == 'gz' else name
+
+
+def listArchive(path):
+    """
+    ROMs held by an archive, from its metadata only
+    @param path str
+    @return list of ArchiveEntry
+    """
+    kind = archiveType(path)
+    if kind == ZIP:
+        with zipfile.ZipFile(path) as archive:
+            return [
+                ArchiveEntry(info.filename, info.file_size, info.CRC)
+                for info in archive.infolist()
+                if not info.is_dir() and isROM(info.filename)
+            ]
+
+    if kind == GZIP:
+        # the trailer holds CRC32 and size, modulo 2^32, of the data
+        with open(path, 'rb') as fp:
+            fp.seek(-8, os.SEEK_END)
+            crc32, size = struct.unpack('<2I', fp.read(8))
+        return [ArchiveEntry(_gzipName(path), size, crc32)]
+
+    raise ArchiveError('Not an archive "%s"' % path)
+
+
+def findEntry(path, member=None):
+    """
+    @param path str archive
+    @param member str ROM name, defaults to the first ROM of the archive
+    @return ArchiveEntry
+    """
+    entries = listArchive(path)
+    if not entries:
+        raise ArchiveError('No ROM in "%s"' % path)
+    if member is None:
+        if len(entries) > 1:
+            logging.getLogger('Archive').info(
+                '"%s" holds %i ROMs, loading "%s"',
+                path, len(entries), entries[0].name
+            )
+        return entries[0]
+    for entry in entries:
+        if entry.name == member:
+            return entry
+    raise ArchiveError('No "%s" in "%s"' % (member, path))
+
+
+def _indexKey(path, entry):
+    """
+    index file name of an archive member, changes with the archive
+    @param path str archive
+    @param entry ArchiveEntry
+    @return str
+    """
+    stat = os.stat(path)
+    key = '%s\0%i\0%i\0%s' % (
+        os.path.abspath(path), stat.st_size, stat.st_mtime_ns, entry.name
+    )
+    return hashlib.sha1(key.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+def _copy(fp, out, sha1):
+    # streams a decompressed ROM to the cache, hashing it on the way
+    chunk = fp.read(CHUNK_SIZE)
+    while chunk:
+        sha1.update(chunk)
+        out.write(chunk)
+        chunk = fp.read(CHUNK_SIZE)
+
+
+def extract(path, member=None, cache=None):
+    """
+    decompresses a ROM into the cache, unless it is there already
+    @param path str archive
+    @param member str ROM name, defaults to the first ROM of the archive
+    @param cache str cache directory, defaults to DEFAULT_CACHE
+    @return str path of the decompressed ROM
+    """
+    log = logging.getLogger('Archive')
+    cache = cache or DEFAULT_CACHE
+    entry = findEntry(path, member)
+    index = os.path.join(cache, INDEX)
+    key = _indexKey(path, entry)
+
+    try:
+        with open(os.path.join(index, key)) as fp:
+            target = os.path.join(cache, fp.read().strip())
+        if os.path.getsize(target) == entry.size:
+            return target
+    except OSError:
+        pass
+
+    os.makedirs(index, exist_ok=True)
+    sha1 = hashlib.sha1()
+    fd, temporary = tempfile.mkstemp(dir=cache, prefix='.extract-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            if archiveType(path) == ZIP:
+                with zipfile.ZipFile(path) as archive:
+                    # checks the CRC32 when done
+                    with archive.open(entry.name) as fp:
+                        _copy(fp, out, sha1)
+            else:
+                with gzip.open(path, 'rb') as fp:
+                    _copy(fp, out, sha1)
+        digest = sha1.hexdigest()
+        target = os.path.join(cache, digest)
+        # readers only ever see complete files
+        os.replace(temporary, target)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    fd, temporary = tempfile.mkstemp(dir=index, prefix='.index-')
+    with os.fdopen(fd, 'w') as out:
+        out.write(digest)
+    os.replace(temporary, os.path.join(index, key))
+
+    log.debug('"%s" from "%s" cached as %s', entry.name, path, digest)
+    return target
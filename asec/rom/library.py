@@ -0,0 +1,393 @@
+"""
+ROM library: indexes the cartridge header and checksums of every ROM of
+a collection into an SQLite cache.
+
+Files are scanned in a process pool, each one in a single streaming pass:
+the header fields come from bytes 0x100-0x14F, and CRC32, SHA-1 and the
+global checksum are computed on the way through. Entries are keyed by
+path and checked against the file modification time and size, so a
+rescan of an unchanged library only stats the files.
+
+Usage:
+    python -m asec.rom.library roms/
+    python -m asec.rom.library ~/roms --db library.sqlite --json out.json
+"""
+import os
+import sys
+import json
+import zlib
+import sqlite3
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from asec.rom.loaders.gb import CARTRIDGE_TYPES_REPR
+
+
+# ROM file extensions picked up from directories
+EXTENSIONS = ('.gb', '.gbc')
+
+HEADER_OFFSET = 0x100
+HEADER_END = 0x150
+
+# bytes hashed per read
+CHUNK_SIZE = 1 << 20
+
+DEFAULT_DATABASE = os.path.join(os.path.expanduser('~'), '.asec', 'library.db')
+
+
+def headerChecksum(header):
+    """
+    checksum over 0x134-0x14C the boot ROM verifies against 0x14D
+    @param header bytes 0x100-0x14F
+    @return int
+    """
+    x = 0
+    for value in header[0x34:0x4D]:
+        x = (x - value - 1) & 0xFF
+    return x
+
+
+class RomInfo(object):
+    """
+    Header fields and checksums of one ROM file, plain attributes only so
+    it pickles back from the worker processes
+    """
+    # attribute per database column, in order
+    FIELDS = (
+        'path', 'mtime', 'size', 'title', 'cartType', 'romSize', 'ramSize',
+        'destination', 'licensee', 'version', 'headerChecksum',
+        'globalChecksum', 'headerOk', 'globalOk', 'crc32', 'sha1', 'error'
+    )
+
+    def __init__(self, path, mtime=0, size=0):
+        self.path = path
+        self.mtime = mtime  # ns
+        self.size = size
+
+        self.title = ''
+        self.cartType = 0
+        self.romSize = 0  # header byte 0x148
+        self.ramSize = 0  # header byte 0x149
+        self.destination = 0
+        self.licensee = 0
+        self.version = 0
+        self.headerChecksum = 0
+        self.globalChecksum = 0
+        self.headerOk = False
+        self.globalOk = False
+        self.crc32 = 0
+        self.sha1 = None
+        self.error = None
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def typeString(self):
+        return CARTRIDGE_TYPES_REPR.get(self.cartType, 'UNKNOWN')
+
+    def parseHeader(self, header):
+        """
+        @param header bytes 0x100-0x14F
+        """
+        cgb = header[0x43] in (0x80, 0xC0)
+        title = bytes(header[0x34:0x43 if cgb else 0x44]).split(b'\0')[0]
+        self.title = title.decode('ascii', 'replace').strip()
+        self.cartType = header[0x47]
+        self.romSize = header[0x48]
+        self.ramSize = header[0x49]
+        self.destination = header[0x4A]
+        self.licensee = header[0x4B]
+        self.version = header[0x4C]
+        self.headerChecksum = header[0x4D]
+        self.globalChecksum = (header[0x4E] << 8) | header[0x4F]
+        self.headerOk = headerChecksum(header) == self.headerChecksum
+
+    def toRow(self):
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    @classmethod
+    def fromRow(cls, row):
+        info = cls(row[0])
+        for name, value in zip(cls.FIELDS, row):
+            setattr(info, name, value)
+        info.headerOk = bool(info.headerOk)
+        info.globalOk = bool(info.globalOk)
+        return info
+
+    def toDict(self):
+        return dict((name, getattr(self, name)) for name in self.FIELDS)
+
+
+def scanROM(path):
+    """
+    reads the header and hashes the whole file, executed in a worker
+    process
+    @param path str
+    @return RomInfo
+    """
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        info = RomInfo(path)
+        info.error = str(e)
+        return info
+
+    info = RomInfo(path, stat.st_mtime_ns, stat.st_size)
+    crc = 0
+    sha1 = hashlib.sha1()
+    total = 0
+    try:
+        with open(path, 'rb') as fp:
+            header = None
+            chunk = fp.read(CHUNK_SIZE)
+            while chunk:
+                if header is None:
+                    header = chunk[HEADER_OFFSET:HEADER_END]
+                crc = zlib.crc32(chunk, crc)
+                sha1.update(chunk)
+                total += sum(chunk)
+                chunk = fp.read(CHUNK_SIZE)
+    except OSError as e:
+        info.error = str(e)
+        return info
+
+    info.crc32 = crc
+    info.sha1 = sha1.hexdigest()
+    if header is None or len(header) < HEADER_END - HEADER_OFFSET:
+        info.error = 'No cartridge header'
+        return info
+
+    info.parseHeader(header)
+    # the sum skips the checksum bytes themselves
+    total -= header[0x4E] + header[0x4F]
+    info.globalOk = (total & 0xFFFF) == info.globalChecksum
+    return info
+
+
+def findROMs(paths):
+    """
+    expands directories, recursively, into the ROM files they hold
+    @param paths list of files and directories
+    @return list of absolute paths
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(EXTENSIONS):
+                        found.append(os.path.abspath(os.path.join(root, name)))
+        else:
+            found.append(os.path.abspath(path))
+    return found
+
+
+class Library(object):
+    """
+    ROM index cached in SQLite
+    """
+    # bumped when RomInfo.FIELDS or their meaning change
+    SCHEMA_VERSION = 1
+
+    def __init__(self, database=DEFAULT_DATABASE, workers=None):
+        """
+        @param database str SQLite file, ':memory:' for no cache
+        @param workers int processes, defaults to the number of cores
+        """
+        self.log = logging.getLogger(self.__class__.__name__)
+        self.workers = workers or os.cpu_count() or 1
+
+        if database != ':memory:':
+            directory = os.path.dirname(os.path.abspath(database))
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(database)
+        self._createSchema()
+
+        # cache hits and files scanned by the last scan()
+        self.hits = 0
+        self.scanned = 0
+
+    def close(self):
+        self.db.close()
+
+    def _createSchema(self):
+        version = self.db.execute('PRAGMA user_version').fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            self.db.execute('DROP TABLE IF EXISTS roms')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS roms (path TEXT PRIMARY KEY, %s)' %
+            ', '.join(RomInfo.FIELDS[1:])
+        )
+        self.db.execute('PRAGMA user_version = %i' % self.SCHEMA_VERSION)
+        self.db.commit()
+
+    def get(self, path):
+        """
+        @param path str
+        @return RomInfo|None cached entry, stale or not
+        """
+        row = self.db.execute(
+            'SELECT %s FROM roms WHERE path = ?' % ', '.join(RomInfo.FIELDS),
+            (os.path.abspath(path),)
+        ).fetchone()
+        return RomInfo.fromRow(row) if row else None
+
+    def all(self):
+        """
+        @return list of RomInfo, every cached entry by path
+        """
+        return [
+            RomInfo.fromRow(row) for row in self.db.execute(
+                'SELECT %s FROM roms ORDER BY path' %
+                ', '.join(RomInfo.FIELDS)
+            )
+        ]
+
+    def _cached(self, paths):
+        cached = {}
+        query = 'SELECT %s FROM roms WHERE path = ?' % \
+            ', '.join(RomInfo.FIELDS)
+        for path in paths:
+            row = self.db.execute(query, (path,)).fetchone()
+            if row is not None:
+                cached[path] = RomInfo.fromRow(row)
+        return cached
+
+    def scan(self, paths, progress=None):
+        """
+        indexes ROM files and directories, only files that changed since
+        they were cached are read
+        @param paths list of files and directories
+        @param progress callable(RomInfo) called as files are scanned
+        @return list of RomInfo in path order
+        """
+        roms = findROMs(paths)
+        cached = self._cached(roms)
+
+        results = {}
+        stale = []
+        for path in roms:
+            info = cached.get(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if info is not None and stat is not None and \
+               info.mtime == stat.st_mtime_ns and info.size == stat.st_size:
+                results[path] = info
+            else:
+                stale.append(path)
+
+        self.hits = len(results)
+        self.scanned = len(stale)
+
+        if len(stale) > 1 and self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                chunksize = max(1, len(stale) // (self.workers * 8))
+                scanned = pool.map(scanROM, stale, chunksize=chunksize)
+                self._store(scanned, results, progress)
+        else:
+            self._store(map(scanROM, stale), results, progress)
+
+        self.log.debug(
+            '%i ROMs, %i cached, %i scanned', len(roms), self.hits,
+            self.scanned
+        )
+        return [results[path] for path in roms]
+
+    def _store(self, scanned, results, progress):
+        query = 'INSERT OR REPLACE INTO roms VALUES (%s)' % \
+            ', '.join('?' * len(RomInfo.FIELDS))
+        with self.db:
+            for info in scanned:
+                results[info.path] = info
+                self.db.execute(query, info.toRow())
+                if progress is not None:
+                    progress(info)
+
+    def prune(self):
+        """
+        drops entries of files that no longer exist
+        @return int entries dropped
+        """
+        gone = [
+            (path,) for path, in self.db.execute('SELECT path FROM roms')
+            if not os.path.exists(path)
+        ]
+        with self.db:
+            self.db.executemany('DELETE FROM roms WHERE path = ?', gone)
+        return len(gone)
+
+
+def report(roms, fp):
+    """
+    writes a plain text listing
+    @param roms list of RomInfo
+    @param fp text file
+    """
+    width = max([len(info.name) for info in roms] + [4])
+    for info in roms:
+        if not info.ok:
+            fp.write('%-*s  ERROR  %s\n' % (width, info.name, info.error))
+            continue
+        fp.write('%-*s  %-16s  %-24s  %08x  %s%s\n' % (
+            width, info.name, info.title, info.typeString, info.crc32,
+            'header ok' if info.headerOk else 'BAD HEADER',
+            '' if info.globalOk else ', bad global checksum'
+        ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m asec.rom.library',
+        description='Index ROM headers and checksums into a cache.'
+    )
+    parser.add_argument('paths', nargs='+', help='ROM files or directories')
+    parser.add_argument('--db', default=DEFAULT_DATABASE,
+                        help='SQLite cache, defaults to %(default)s')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes, defaults to the core count')
+    parser.add_argument('--prune', action='store_true',
+                        help='drop cached entries of deleted files')
+    parser.add_argument('--json', metavar='PATH', default=None,
+                        help='write the entries as JSON')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)-15s\t%(levelname)-10s\t"
+               "%(name)-20s\t%(process)-5d\t%(message)s"
+    )
+
+    library = Library(args.db, args.workers)
+    try:
+        if args.prune:
+            library.prune()
+        roms = library.scan(args.paths)
+    finally:
+        library.close()
+
+    report(roms, sys.stdout)
+    sys.stdout.write('%i ROMs, %i cached, %i scanned\n' % (
+        len(roms), library.hits, library.scanned
+    ))
+
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump([info.toDict() for info in roms], fp, indent=2)
+
+    return 1 if any(not info.ok for info in roms) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
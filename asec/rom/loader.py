@@ -1,19 +1,37 @@
 import os
 import logging
-from gzip import GzipFile
+
+from asec.rom import archive
 
 
 class Loader:
-    def __init__(self, path):
+    def __init__(self, path, member=None, cache=None):
+        """
+        @param path str ROM file or archive
+        @param member str ROM to load from an archive holding several,
+                          defaults to the first
+        @param cache str directory of decompressed ROMs,
+                         defaults to archive.DEFAULT_CACHE
+        """
         if not os.path.exists(path):
             raise FileNotFoundError
 
         self.log = logging.getLogger('Loader')
 
         self.path = path
+        self.member = member
+        self.cache = cache
         self._fd = None
 
-        ext = os.path.basename(self.path).split('.')[-1]
+        # file name of the ROM itself, inside the archive for compressed
+        # ones
+        self.archive = archive.archiveType(path)
+        if self.archive is not None:
+            self.romName = archive.findEntry(path, member).name
+        else:
+            self.romName = os.path.basename(path)
+
+        ext = self.romName.split('.')[-1].lower()
         if ext in ['gb', 'gbc', 'gba', 'gbz']:
             from asec.rom.loaders.gb import InfoLoader
             self.loader = InfoLoader(self)
@@ -21,18 +39,27 @@ class Loader:
             from asec.rom.loaders.sega import InfoLoader
             self.loader = InfoLoader(self)
 
+    @property
+    def romPath(self):
+        """
+        path of the ROM as if it was stored uncompressed next to the
+        archive, save files are named after it
+        @return str
+        """
+        if self.archive is None:
+            return self.path
+        return os.path.join(
+            os.path.dirname(self.path), os.path.basename(self.romName)
+        )
+
     def read(self):
         try:
-            if self.path[-1] == 'z':
-                try:
-                    fd = GzipFile(self.path)
-                except:
-                    fd = open(self.path, 'rb')
-                self._fd = fd
-            else:
-                self._fd = open(self.path, 'rb')
+            path = self.path
+            if self.archive is not None:
+                path = archive.extract(self.path, self.member, self.cache)
+            self._fd = open(path, 'rb')
         except Exception as e:
-            self.log.error('Can not load ROM', e)
+            self.log.error('Can not load ROM: %s', e)
         else:
             self.loader.read()
 
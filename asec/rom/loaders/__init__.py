@@ -1,10 +1,8 @@
-from asec.memory.rom import ROM
-
-
 class DefaultLoader(object):
     def __init__(self, cartridge):
         self.cartridge = cartridge
-        self.ROM = ROM(self.rom_size)
+        # created by read()
+        self.ROM = None
 
     def read(self):
         raise NotImplementedError
@@ -15,10 +13,15 @@ class DefaultLoader(object):
 
     @property
     def rom_size(self):
-        return getattr(self, '_rom_size', 0x100000)
+        """
+        @return int bytes, 0 before read()
+        """
+        return self.ROM.size if self.ROM is not None else 0
 
-    def emulator(self):
+    def emulator(self, debug=None, battery=True):
         """
+        @param debug bool build the instrumented device
+        @param battery bool keep battery-backed RAM in a save file
         @return Device
         """
         raise NotImplementedError
@@ -1,4 +1,5 @@
 from asec.rom.loaders import DefaultLoader
+from asec.memory.rom.gb import Cartridge
 
 
 CARTRIDGE_TYPES_REPR = {
@@ -21,14 +22,8 @@ CARTRIDGE_TYPES_REPR = {
 
 
 class InfoLoader(DefaultLoader):
-    def __init__(self, cartridge):
-        self._rom_size = 0x100000
-        super(InfoLoader, self).__init__(cartridge)
-
     def read(self):
-        self.ROM.load(self.cartridge._fd)
-        # for i, b in enumerate(self.cartridge._fd.read()):
-        #     self.ROM[i] = b  # ord(b)
+        self.ROM = Cartridge.open(self.cartridge._fd)
 
         # 0134 - 0143 - Title
         title = ""
@@ -48,7 +43,7 @@ class InfoLoader(DefaultLoader):
         # Specifies the ROM Size of the cartridge.
         # Typically calculated as "32KB shl N".
         rom_size = self.ROM[0x148]
-        self._rom_size = rom_size
+        self._rom_size_code = rom_size
         # print('ROM size:', rom_size)
 
         # 0149 - RAM Size
@@ -87,7 +82,7 @@ class InfoLoader(DefaultLoader):
         # Contains a 16 bit checksum (upper byte first) across the whole cartridge ROM.
         # Produced by adding all bytes of the cartridge (except for the two checksum bytes).
         # The Gameboy doesn't verify this checksum.
-        global_checksum = ((self.ROM[0x14E] << 8) & self.ROM[0x14D])
+        global_checksum = (self.ROM[0x14E] << 8) | self.ROM[0x14F]
         # print('Global checksum:', global_checksum)
 
     @property
@@ -102,17 +97,24 @@ class InfoLoader(DefaultLoader):
     def type_string(self):
         return CARTRIDGE_TYPES_REPR[self.type]
 
-    @property
-    def rom_size(self):
-        return self._rom_size
-
     @property
     def rom_size_string(self):
-        return self._rom_size
-
-    def emulator(self):
+        """
+        size the header declares
+        @return str
+        """
+        code = self._rom_size_code
+        if code <= 8:
+            return '%iKB' % (32 << code)
+        if code in Cartridge.IRREGULAR_BANKS:
+            return '%iKB' % (Cartridge.IRREGULAR_BANKS[code] * 16)
+        return 'Unknown'
+
+    def emulator(self, debug=None, battery=True):
         from asec.asset.gb import Device
-        emu = Device()
+        emu = Device(debug=debug)
         emu.MMU.ROM = self.ROM
         emu.MMU.cartType = self.ROM.readByte(0x147)
+        if battery:
+            emu.MMU.loadBattery(emu.MMU.batteryPath(self.cartridge.romPath))
         return emu
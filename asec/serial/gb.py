@@ -0,0 +1,92 @@
+import struct
+import logging
+
+from asec.utils.signal import Signal
+from asec.interrupt.gb import InterruptController
+
+
+class SerialPort(object):
+    """
+    Link port, SB (0xFF01) and SC (0xFF02), with nothing plugged in.
+
+    A transfer started with the internal clock completes after 8 bits at
+    8192 Hz. The byte sent is appended to `output`, SB reads 0xFF as no
+    partner drives the line, and the serial interrupt is requested.
+    Transfers on the external clock never complete, as on hardware.
+    """
+    # 8 bits at 8192 Hz, m-cycles
+    TRANSFER_CYCLES = 1024
+
+    # SB, SC
+    STATE = struct.Struct('<2B')
+
+    def __init__(self, mainboard):
+        self.mainboard = mainboard
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self.scheduler = mainboard.scheduler
+        self.scheduler.register('serial.transfer', self._transferred)
+
+        self.sb = 0
+        self.sc = 0
+
+        # every byte sent since reset
+        self.output = bytearray()
+
+        # emitted with each byte sent
+        self.transmitted = Signal()
+
+        self.reset()
+
+    def reset(self):
+        self.sb = 0
+        self.sc = 0
+        del self.output[:]
+        self.scheduler.cancel('serial.transfer')
+
+    @property
+    def text(self):
+        """
+        output decoded as latin-1, test ROMs print ASCII
+        @return str
+        """
+        return self.output.decode('latin-1')
+
+    def saveState(self):
+        """
+        @return bytes, the output buffer is not saved
+        """
+        return self.STATE.pack(self.sb, self.sc)
+
+    def loadState(self, data):
+        """
+        @param data bytes from saveState()
+        """
+        self.sb, self.sc = self.STATE.unpack(data)
+
+    def _transferred(self, when):
+        value = self.sb
+        self.sb = 0xFF
+        self.sc &= 0x7F
+        self.mainboard.INT.request(InterruptController.SERIAL)
+        self.output.append(value)
+        self.transmitted(value)
+
+    def readByte(self, address):
+        if address == 0xFF01:
+            return self.sb
+        elif address == 0xFF02:
+            return self.sc | 0x7E
+
+    def writeByte(self, address, value):
+        if address == 0xFF01:
+            self.sb = value
+        elif address == 0xFF02:
+            self.sc = value & 0x81
+            if (value & 0x81) == 0x81:
+                self.scheduler.schedule(
+                    'serial.transfer',
+                    self.scheduler.now + self.TRANSFER_CYCLES
+                )
+            else:
+                self.scheduler.cancel('serial.transfer')
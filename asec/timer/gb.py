@@ -1,96 +1,150 @@
+import struct
 import logging
 
+from asec.interrupt.gb import InterruptController
 
-class Clock(object):
-    def __init__(self):
-        self.log = logging.getLogger(self.__class__.__name__)
-        self.main = 0
-        self.sub = 0
-        self.div = 0
 
-    def reset(self):
-        self.main = 0
-        self.sub = 0
-        self.div = 0
-        self.log.debug('reset')
+class Timer(object):
+    """
+    DIV/TIMA are not counted per instruction, they are derived from the
+    CPU clock when read. Only the TIMA overflow is a scheduled event.
+    """
+    # TIMA period per TAC input clock select, m-cycles
+    TIMA_PERIODS = (256, 4, 16, 64)
 
+    # DIV period, m-cycles
+    DIV_PERIOD = 64
+
+    # TMA, TAC, divider base, TIMA, TIMA base
+    STATE = struct.Struct('<2BqBq')
 
-class Timer(object):
     def __init__(self, mainboard):
         self.mainboard = mainboard
         self.log = logging.getLogger(self.__class__.__name__)
 
-        self.div = 0
+        self.scheduler = mainboard.scheduler
+        self.scheduler.register('timer.overflow', self._overflow)
+
         self.tma = 0
-        self.tima = 0
         self.tac = 0
 
-        self.clock = Clock()
+        # m-cycle the divider was last reset at
+        self._divBase = 0
+        # TIMA value as of m-cycle _timaBase
+        self._tima = 0
+        self._timaBase = 0
+
         self.reset()
 
     def reset(self):
-        self.div = 0
+        now = self.scheduler.now
         self.tma = 0
-        self.tima = 0
         self.tac = 0
-        self.clock.reset()
+        self._divBase = now
+        self._tima = 0
+        self._timaBase = now
+        self.scheduler.cancel('timer.overflow')
         self.log.debug('reset')
 
-    def inc(self):
-        self.clock.sub += self.mainboard.CPU.R.m
-        if self.clock.sub > 3:
-            self.clock.main += 1
-            self.clock.sub -= 4
-
-            self.clock.div += 1
-            if self.clock.div == 16:
-                self.clock.div = 0
-                self.div += 1
-                self.div &= 255
-
-        if self.tac & 4:
-            tac3 = self.tac & 3
-            if tac3 == 0:
-                if self.clock.main >= 64:
-                    self.step()
-            elif tac3 == 1:
-                if self.clock.main >= 1:
-                    self.step()
-            elif tac3 == 2:
-                if self.clock.main >= 4:
-                    self.step()
-            elif tac3 == 3:
-                if self.clock.main >= 16:
-                    self.step()
-
-    def step(self):
-        self.tima += 1
-        self.clock.main = 0
-
-        if self.tima > 255:
-            self.tima = self.tma
-            self.mainboard.MMU.IF |= 4
+    def saveState(self):
+        """
+        @return bytes, the overflow event is saved with the scheduler
+        """
+        return self.STATE.pack(
+            self.tma, self.tac, self._divBase, self._tima, self._timaBase
+        )
+
+    def loadState(self, data):
+        """
+        @param data bytes from saveState()
+        """
+        (
+            self.tma, self.tac, self._divBase, self._tima, self._timaBase
+        ) = self.STATE.unpack(data)
+
+    @property
+    def div(self):
+        return ((self.scheduler.now - self._divBase) // self.DIV_PERIOD) & 255
+
+    @property
+    def tima(self):
+        if not self.tac & 4:
+            return self._tima
+        return (self._tima + self._increments(self.scheduler.now)) & 255
+
+    def _increments(self, now):
+        """
+        TIMA increments between _timaBase and now, TIMA counts on the
+        divider edges
+        @param now int
+        @return int
+        """
+        period = self.TIMA_PERIODS[self.tac & 3]
+        return (
+            (now - self._divBase) // period -
+            (self._timaBase - self._divBase) // period
+        )
+
+    def _sync(self):
+        now = self.scheduler.now
+        self._tima = self.tima
+        self._timaBase = now
+
+    def _reschedule(self):
+        if not self.tac & 4:
+            self.scheduler.cancel('timer.overflow')
+            return
+
+        period = self.TIMA_PERIODS[self.tac & 3]
+        edges = (self._timaBase - self._divBase) // period
+        self.scheduler.schedule(
+            'timer.overflow',
+            self._divBase + (edges + 256 - self._tima) * period
+        )
+
+    def _overflow(self, when):
+        self._tima = self.tma
+        self._timaBase = when
+        self.mainboard.INT.request(InterruptController.TIMER)
+        self._reschedule()
 
     def readByte(self, address):
         if address == 0xFF04:
-            self.log.debug('In section: div')
             return self.div
         elif address == 0xFF05:
-            self.log.debug('In section: tima')
             return self.tima
         elif address == 0xFF06:
-            self.log.debug('In section: tma')
             return self.tma
         elif address == 0xFF07:
-            self.log.debug('In section: tac')
             return self.tac
 
     def writeByte(self, address, value):
         if address == 0xFF04:
-            self.div = value
+            # any write resets the divider
+            self._sync()
+            self._divBase = self._timaBase
+            self._reschedule()
         elif address == 0xFF05:
-            self.tima = value
+            self._sync()
+            self._tima = value & 255
+            self._reschedule()
         elif address == 0xFF06:
             self.tma = value
         elif address == 0xFF07:
+            self._sync()
             self.tac = value
+            self._reschedule()
+
+
+class DebugTimer(Timer):
+    """
+    Timer logging register accesses
+    """
+    def readByte(self, address):
+        value = super(DebugTimer, self).readByte(address)
+        self.log.debug("[0x%06X] >> 0x%06X", address, value)
+        return value
+
+    def writeByte(self, address, value):
+        self.log.debug("[0x%06X] << 0x%06X", address, value)
+        super(DebugTimer, self).writeByte(address, value)
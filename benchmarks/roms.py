@@ -0,0 +1,175 @@
+"""
+Emulator throughput benchmark over the bundled ROMs.
+
+Every ROM is booted through InfoLoader.emulator(), runs untimed until the
+boot ROM hands over to the cartridge, then runs a fixed number of frames
+of game code headless. Results are written as JSON so that runs can be
+compared across commits:
+
+    python -m benchmarks.roms --output before.json
+    python -m benchmarks.roms --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import glob
+import time
+import logging
+import platform
+import argparse
+import subprocess
+
+from asec.headless import HeadlessRunner, CPU_FREQUENCY
+
+
+ROMS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'roms')
+
+# frames timed once the game code runs, 5 seconds of emulated time
+DEFAULT_FRAMES = 300
+
+# the boot ROM takes 333 frames, a ROM failing its logo check never
+# leaves it
+BOOT_FRAMES = 1000
+
+
+def revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def boot(runner):
+    """
+    runs frames until the boot ROM is unmapped
+    @param runner HeadlessRunner
+    @return int frames run
+    """
+    frames = 0
+    mmu = runner.emulator.MMU
+    while mmu.inBios:
+        if frames >= BOOT_FRAMES:
+            raise RuntimeError(
+                'still in the boot ROM after %i frames' % frames
+            )
+        runner.runFrame()
+        frames += 1
+    return frames
+
+
+def benchmark(path, frames, repeat=1):
+    """
+    runs the ROM `repeat` times on a fresh device, keeps the fastest run
+    @param path str
+    @param frames int timed after boot
+    @param repeat int
+    @return dict
+    """
+    best = None
+    for _ in range(repeat):
+        # the tracked save files are left alone
+        runner = HeadlessRunner.fromFile(path, battery=False)
+        try:
+            bootFrames = boot(runner)
+            result = runner.run(frames=frames)
+        finally:
+            runner.emulator.close()
+        if best is None or result.elapsed < best.elapsed:
+            best = result
+
+    return {
+        'rom': os.path.basename(path),
+        'boot_frames': bootFrames,
+        'cycles': best.tcycles,
+        'frames': best.frames,
+        'instructions': best.instructions,
+        'seconds': best.elapsed,
+        'instructions_per_second': best.instructionsPerSecond,
+        'frames_per_second': best.framesPerSecond,
+        'cycles_per_second': best.cyclesPerSecond,
+        'realtime_ratio': best.speed,
+        'memory_sha1': runner.memoryDigest(),
+    }
+
+
+def compare(results, baseline):
+    previous = dict((r['rom'], r) for r in baseline['results'])
+    for r in results:
+        old = previous.get(r['rom'])
+        if not old or not old['cycles_per_second']:
+            continue
+        print('%-32s %8.2fx  (was %.3f, now %.3f real-time)' % (
+            r['rom'],
+            r['cycles_per_second'] / old['cycles_per_second'],
+            old['realtime_ratio'],
+            r['realtime_ratio']
+        ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.roms',
+        description='Benchmark emulation speed over the bundled ROMs.'
+    )
+    parser.add_argument('roms', nargs='*',
+                        help='ROM files (default: every roms/*.gb)')
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES,
+                        help='frames timed per ROM after the boot ROM '
+                             '(default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='runs per ROM, the fastest is kept')
+    parser.add_argument('--output', metavar='PATH', default=None,
+                        help='write results as JSON')
+    parser.add_argument('--compare', metavar='PATH', default=None,
+                        help='JSON results of a previous run')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    roms = args.roms or sorted(glob.glob(os.path.join(ROMS_DIR, '*.gb')))
+
+    results = []
+    for path in roms:
+        try:
+            r = benchmark(path, args.frames, args.repeat)
+        except Exception as e:
+            logging.getLogger('benchmark').error(
+                '%s failed: %r', os.path.basename(path), e
+            )
+            continue
+        results.append(r)
+        print('%-32s %10.0f instr/s %8.2f frames/s %8.3fx real-time  %s' % (
+            r['rom'],
+            r['instructions_per_second'],
+            r['frames_per_second'],
+            r['realtime_ratio'],
+            r['memory_sha1'][:12]
+        ))
+
+    report = {
+        'revision': revision(),
+        'timestamp': time.time(),
+        'python': platform.python_implementation() + ' ' +
+                  platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_frequency': CPU_FREQUENCY,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(report, fp, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(results, json.load(fp))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())